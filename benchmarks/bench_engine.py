@@ -0,0 +1,83 @@
+"""Drives many simulated concurrent sessions through QuizEngine in one process.
+
+Sessions are started up front and then answered round-robin, so every
+session stays open for the whole run.
+
+Usage: python benchmarks/bench_engine.py [--sessions N] [--questions N] [--categories N]
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import Leaderboard, QuizCategory, QuizEngine, UserManager
+
+
+def write_question_bank(path, categories, questions):
+    data = {"categories": [
+        {
+            "name": f"Category {c}",
+            "questions": [
+                {"question": f"Question {q}?", "options": ["A", "B", "C", "D"], "correct_answer": "B"}
+                for q in range(questions)
+            ],
+        }
+        for c in range(categories)
+    ]}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--categories", type=int, default=5)
+    parser.add_argument("--fsync", action="store_true", help="fsync every journal record")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        category_file = os.path.join(directory, "quiz_categories.json")
+        write_question_bank(category_file, args.categories, args.questions)
+        leaderboard = Leaderboard(os.path.join(directory, "leaderboard.json"), journal=True, fsync=args.fsync)
+        engine = QuizEngine(UserManager(os.path.join(directory, "users.json")), QuizCategory(category_file), leaderboard)
+
+        start = time.perf_counter()
+        session_ids = [
+            engine.start_session(f"player{i}", f"Category {i % args.categories}") for i in range(args.sessions)
+        ]
+        started = time.perf_counter() - start
+
+        latencies = []
+        answered = 0
+        start = time.perf_counter()
+        while session_ids:
+            still_open = []
+            for session_id in session_ids:
+                began = time.perf_counter()
+                result = engine.answer(session_id, random.choice("ABCD"))
+                latencies.append(time.perf_counter() - began)
+                answered += 1
+                if result["finished"]:
+                    engine.end_session(session_id)
+                else:
+                    still_open.append(session_id)
+            session_ids = still_open
+        elapsed = time.perf_counter() - start
+        leaderboard.close()
+
+    latencies.sort()
+    print(f"{args.sessions} sessions started in {started:.2f} s")
+    print(f"{answered} answers in {elapsed:.2f} s: {answered / elapsed:.0f} answers/s")
+    print(f"latency p50 {statistics.median(latencies) * 1e6:.1f} us, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1e6:.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Measures bulk question import and export throughput in rows per second.
+
+For comparison, the first --single rows are also added through
+QuizCategory.add_question, which saves the question bank after each one.
+
+Usage: python benchmarks/bench_import.py [--rows N] [--single N]
+"""
+import argparse
+import contextlib
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import OPTION_SEPARATOR, QUESTION_CSV_FIELDS, QuizCategory
+from storage import SQLiteStorage
+
+
+def write_rows(directory, rows):
+    """Writes the same rows as CSV and JSON Lines; one row in fifty repeats an earlier one."""
+    records = []
+    for number in range(rows):
+        question = number - 25 if number % 50 == 49 else number
+        options = [f"Answer {question}.{option}" for option in range(4)]
+        records.append((f"Category {question % 20}", f"Question {question}?", options, options[question % 4]))
+    csv_path = os.path.join(directory, "questions.csv")
+    with open(csv_path, "w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(QUESTION_CSV_FIELDS)
+        for category, question, options, correct_answer in records:
+            writer.writerow([category, question, OPTION_SEPARATOR.join(options), correct_answer])
+    jsonl_path = os.path.join(directory, "questions.jsonl")
+    with open(jsonl_path, "w", encoding="utf-8") as file:
+        for category, question, options, correct_answer in records:
+            file.write(json.dumps({
+                "category": category, "question": question, "options": options, "correct_answer": correct_answer,
+            }) + "\n")
+    return records, csv_path, jsonl_path
+
+
+def add_one_by_one(quiz_category, records):
+    for category, question, options, correct_answer in records:
+        if category not in quiz_category.categories_by_name:
+            quiz_category.add_category(category)
+        quiz_category.add_question(category, question, options, correct_answer)
+
+
+def timed(action):
+    start = time.perf_counter()
+    result = action()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--single", type=int, default=1000, help="rows added one by one with add_question")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        records, csv_path, jsonl_path = write_rows(directory, args.rows)
+
+        quiz_category = QuizCategory(os.path.join(directory, "single.json"))
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, elapsed = timed(lambda: add_one_by_one(quiz_category, records[:args.single]))
+        print(f"add_question x{args.single:<8}{args.single / elapsed:12.0f} rows/s")
+
+        for label, source in (("CSV", csv_path), ("JSONL", jsonl_path)):
+            for mode, options in (("json", {}), ("lazy", {"lazy": True}), ("sqlite", None)):
+                storage = None
+                if options is None:
+                    storage = SQLiteStorage(os.path.join(directory, f"{label}.db"))
+                    options = {"storage": storage}
+                quiz_category = QuizCategory(os.path.join(directory, f"{label}-{mode}.json"), **options)
+                summary, elapsed = timed(lambda: quiz_category.import_questions(source))
+                print(f"import {label:<5} {mode:<7}{args.rows / elapsed:12.0f} rows/s  "
+                      f"({summary['imported']} imported, {summary['duplicates']} duplicates)")
+                if storage is not None:
+                    storage.close()
+
+        quiz_category = QuizCategory(os.path.join(directory, "CSV-json.json"), lazy=True)
+        for label, target in (("CSV", "export.csv"), ("JSONL", "export.jsonl")):
+            count, elapsed = timed(lambda: quiz_category.export_questions(os.path.join(directory, target)))
+            print(f"export {label:<13}{count / elapsed:12.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Compares leaderboard updates per second: full JSON rewrite vs. journal mode.
+
+Usage: python benchmarks/bench_leaderboard_journal.py [--players N] [--updates N]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import Leaderboard
+
+
+def write_leaderboard(path, players, categories):
+    data = {
+        f"Category {c}": {f"player{p}": random.randrange(0, 200, 10) for p in range(players)}
+        for c in range(categories)
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=4)
+
+
+def run(label, leaderboard, updates, players, categories):
+    start = time.perf_counter()
+    for _ in range(updates):
+        leaderboard.update_leaderboard(
+            f"Category {random.randrange(categories)}",
+            f"player{random.randrange(players)}",
+            random.randrange(0, 200, 10),
+        )
+    elapsed = time.perf_counter() - start
+    leaderboard.close()
+    print(f"{label:<24} {updates / elapsed:>12.1f} updates/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--players", type=int, default=10000)
+    parser.add_argument("--categories", type=int, default=4)
+    parser.add_argument("--updates", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{args.players} players x {args.categories} categories, {args.updates} updates")
+    modes = [
+        ("full rewrite", {}),
+        ("journal (fsync)", {"journal": True}),
+        ("journal (no fsync)", {"journal": True, "fsync": False}),
+    ]
+    for label, options in modes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "leaderboard.json")
+            write_leaderboard(path, args.players, args.categories)
+            run(label, Leaderboard(path, **options), args.updates, args.players, args.categories)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Measures UserManager.login latency at several user counts.
+
+Users are written pre-hashed by datagen.py with a cheap PBKDF2 setting, and
+UserManager gets the same hasher, so a login measures the lookup and one
+cheap hash check rather than a legacy-password upgrade.
+
+Usage: python benchmarks/bench_login.py [--sizes 1000 100000 1000000] [--logins N]
+"""
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import datagen
+from quiz import UserManager
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 1000000])
+    parser.add_argument("--logins", type=int, default=10000)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "users.json")
+            datagen.write_users(path, size)
+            manager = UserManager(path, hasher=datagen.HASHER)
+            picks = [random.randrange(size) for _ in range(args.logins)]
+            # login() prints a message per call; keep it out of the timing output.
+            with contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                for i in picks:
+                    identifier = f"{datagen.username(i)}@example.com" if i % 2 else datagen.username(i)
+                    manager.login(identifier, datagen.PASSWORD)
+                elapsed = time.perf_counter() - start
+        print(f"{size:>10} users  {elapsed / args.logins * 1e6:8.2f} us/login")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Measures memory per question and per leaderboard player with tracemalloc.
+
+For questions, "dict" is the representation loaded straight from the JSON
+file (the previous in-memory format); "compact" is the Question records
+QuizCategory now keeps. For players, "dict" is the per-category score
+dictionary Leaderboard keeps; "array" is the alternative of an
+identifier-to-slot map over an int array, measured so the choice of plain
+dictionaries can be checked again. The ranked index built on first use is
+reported separately. Only memory that stays allocated after loading is
+counted.
+
+Usage: python benchmarks/bench_memory.py [--questions N] [--players N] [--max-score N]
+"""
+import argparse
+import array
+import json
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import Question, RankedIndex
+
+OPTION_SETS = [
+    ["True", "False"],
+    ["Paris", "London", "Berlin", "Madrid"],
+    ["1", "2", "3", "4"],
+    ["All of the above", "None of the above", "Only A", "Only B"],
+]
+
+
+def question_bank(count):
+    questions = []
+    for number in range(count):
+        options = OPTION_SETS[number % len(OPTION_SETS)]
+        questions.append({
+            "question": f"Question {number}: which of these answers is the correct one?",
+            "options": options,
+            "correct_answer": options[number % len(options)],
+        })
+    return json.dumps({"categories": [{"name": "Benchmark", "questions": questions}]})
+
+
+def scoreboard(count, max_score):
+    scores = {f"player{number}@example.com": random.randrange(0, max_score + 1, 10) for number in range(count)}
+    return json.dumps({"Benchmark": scores})
+
+
+def array_scores(text):
+    """Loads the scores as {category: (slots, array of scores)}."""
+    categories = {}
+    for category, scores in json.loads(text).items():
+        categories[category] = ({identifier: slot for slot, identifier in enumerate(scores)},
+                                array.array("i", scores.values()))
+    return categories
+
+
+def retained(build):
+    """Returns the bytes still allocated by the object `build` returns."""
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return size
+
+
+def load_questions(text):
+    categories = json.loads(text)["categories"]
+    for category in categories:
+        category["questions"] = [Question.from_dict(question) for question in category["questions"]]
+    return categories
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=200000)
+    parser.add_argument("--players", type=int, default=200000)
+    parser.add_argument("--max-score", type=int, default=2000, help="scores above 256 are separate int objects")
+    args = parser.parse_args()
+
+    text = question_bank(args.questions)
+    before = retained(lambda: json.loads(text)) / args.questions
+    after = retained(lambda: load_questions(text)) / args.questions
+    print(f"per question: dict {before:7.1f} B   compact {after:7.1f} B   ({after / before - 1:+.0%})")
+
+    text = scoreboard(args.players, args.max_score)
+    before = retained(lambda: json.loads(text)) / args.players
+    after = retained(lambda: array_scores(text)) / args.players
+    scores = json.loads(text)["Benchmark"]
+    index = retained(lambda: RankedIndex(scores)) / args.players
+    print(f"per player:   dict {before:7.1f} B   array {after:7.1f} B   ({after / before - 1:+.0%})   "
+          f"ranked index {index:7.1f} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Measures password-checking logins per second per core at several KDF cost settings.
+
+Each setting is timed on one core (sequential UserManager.login calls) and
+through login_async on a process pool with one worker per core.
+
+Usage: python benchmarks/bench_password.py [--logins N] [--processes N]
+"""
+import argparse
+import concurrent.futures
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import PasswordHasher, UserManager
+
+SETTINGS = [
+    ("pbkdf2_sha256 100k", PasswordHasher("pbkdf2_sha256", iterations=100000)),
+    ("pbkdf2_sha256 300k", PasswordHasher("pbkdf2_sha256", iterations=300000)),
+    ("pbkdf2_sha256 600k", PasswordHasher("pbkdf2_sha256", iterations=600000)),
+    ("scrypt n=2^14", PasswordHasher("scrypt", scrypt_n=2 ** 14)),
+    ("scrypt n=2^15", PasswordHasher("scrypt", scrypt_n=2 ** 15)),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    print(f"{'setting':<20} {'1 core':>12} {f'{args.processes} processes':>16} {'per core':>12}")
+    with concurrent.futures.ProcessPoolExecutor(args.processes) as pool:
+        for label, hasher in SETTINGS:
+            with tempfile.TemporaryDirectory() as directory, contextlib.redirect_stdout(io.StringIO()):
+                manager = UserManager(os.path.join(directory, "users.json"), hasher=hasher, executor=pool)
+                manager.register("bench@example.com", "bench", "secret")
+
+                start = time.perf_counter()
+                for _ in range(args.logins):
+                    manager.login("bench", "secret")
+                sequential = args.logins / (time.perf_counter() - start)
+
+                start = time.perf_counter()
+                futures = [manager.login_async("bench", "secret") for _ in range(args.logins * args.processes)]
+                concurrent.futures.wait(futures)
+                parallel = args.logins * args.processes / (time.perf_counter() - start)
+            print(f"{label:<20} {sequential:>10.1f}/s {parallel:>14.1f}/s {parallel / args.processes:>10.1f}/s")
+
+
+if __name__ == "__main__":
+    main()
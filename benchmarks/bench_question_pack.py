@@ -0,0 +1,64 @@
+"""Measures cold-start time and file size of the JSON bank versus a compiled question pack.
+
+Startup is timed up to the first question of the last category being
+available, for the eager JSON loader, lazy mode (with a warm .idx cache) and
+pack mode (with an up-to-date pack).
+
+Usage: python benchmarks/bench_question_pack.py [--categories N] [--questions N]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from question_pack import compile_pack
+from quiz import QuizCategory
+
+
+def write_bank(path, categories, questions):
+    bank = {"categories": [
+        {"name": f"Category {c}", "questions": [
+            {"question": f"Question {c}.{q}: which option is correct?",
+             "options": ["Option A", "Option B", "Option C", "Option D"], "correct_answer": "Option C"}
+            for q in range(questions)
+        ]}
+        for c in range(categories)
+    ]}
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(bank, file, indent=4, ensure_ascii=False)
+
+
+def time_startup(path, **options):
+    start = time.perf_counter()
+    quiz_category = QuizCategory(path, **options)
+    quiz_category.get_questions(quiz_category.category_names()[-1])[0]
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "quiz_categories.json")
+        write_bank(path, args.categories, args.questions)
+        QuizCategory(path, lazy=True)
+        start = time.perf_counter()
+        pack_file = compile_pack(path)
+        compiled = time.perf_counter() - start
+
+        print(f"{args.categories * args.questions} questions: JSON {os.path.getsize(path) / 1e6:.1f} MB, "
+              f"pack {os.path.getsize(pack_file) / 1e6:.1f} MB (compiled in {compiled:.2f} s)")
+        print(f"eager JSON  {time_startup(path) * 1000:10.1f} ms")
+        print(f"lazy JSON   {time_startup(path, lazy=True) * 1000:10.1f} ms")
+        print(f"pack        {time_startup(path, pack=True) * 1000:10.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
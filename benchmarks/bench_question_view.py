@@ -0,0 +1,72 @@
+"""Measures questions rendered per second by the Tk question screen.
+
+Compares rebuilding every widget per question (the previous behaviour) with
+reconfiguring a persistent QuestionView. Each frame is laid out with
+update_idletasks() so geometry work is included. Needs a display.
+
+Usage: python benchmarks/bench_question_view.py [--questions N]
+"""
+import argparse
+import os
+import sys
+import time
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import Question, QuestionView
+
+
+def make_questions(count):
+    return [
+        Question(f"Question {i}?", [f"Option {j}" for j in range(2 + i % 4)], "Option 0")
+        for i in range(count)
+    ]
+
+
+def rebuild(frame, question, score, rank):
+    for widget in frame.winfo_children():
+        widget.destroy()
+    tk.Label(frame, text=f"Current Score: {score}    Your Rank: {rank}", font=("Arial", 12)).pack(pady=5)
+    tk.Label(frame, text=question.question, wraplength=450, font=("Arial", 14)).pack(pady=10)
+    for option in question.options:
+        tk.Button(frame, text=option, command=lambda: None).pack(pady=2, fill="x", padx=20)
+    tk.Button(frame, text="Logout", command=lambda: None).pack(pady=10)
+
+
+def measure(root, render, questions):
+    start = time.perf_counter()
+    for score, question in enumerate(questions):
+        render(question, score, 1)
+        root.update_idletasks()
+    return len(questions) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=2000)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as error:
+        sys.exit(f"A display is required for this benchmark: {error}")
+    root.geometry("500x400")
+    questions = make_questions(args.questions)
+
+    frame = tk.Frame(root)
+    frame.pack(fill="both", expand=True)
+    rate = measure(root, lambda question, score, rank: rebuild(frame, question, score, rank), questions)
+    print(f"destroy and rebuild    {rate:10.1f} questions/s")
+    frame.destroy()
+
+    frame = tk.Frame(root)
+    frame.pack(fill="both", expand=True)
+    view = QuestionView(frame, lambda option: None, lambda: None)
+    rate = measure(root, lambda question, score, rank: view.show(question, score, rank, "Correct answer!", True), questions)
+    print(f"persistent QuestionView {rate:9.1f} questions/s")
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""Measures adaptive question selection on a large category.
+
+Times building the statistics, recording answers and drawing questions
+through QuestionSelector, and checks that questions answered wrongly more
+often are drawn more often. Draw cost should grow with log(questions), not
+with the size of the category.
+
+Usage: python benchmarks/bench_selector.py [--questions N] [--draws N] [--sessions N]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import QuestionSelector
+
+CATEGORY = "Category"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=1000000)
+    parser.add_argument("--draws", type=int, default=100000)
+    parser.add_argument("--sessions", type=int, default=1000, help="sessions that each draw --per-session questions")
+    parser.add_argument("--per-session", type=int, default=20)
+    args = parser.parse_args()
+    generator = random.Random(0)
+    selector = QuestionSelector(random_source=random.Random(1))
+    # Without a stats file the selector only needs the number of questions, not the questions.
+    questions = range(args.questions)
+
+    start = time.perf_counter()
+    stats = selector.stats(CATEGORY, questions)
+    print(f"build {args.questions} weights      {time.perf_counter() - start:10.3f} s")
+
+    # Every tenth question is hard: it is answered wrongly nine times out of ten.
+    start = time.perf_counter()
+    for _ in range(args.draws):
+        index = generator.randrange(args.questions)
+        hard = index % 10 == 0
+        selector.record(CATEGORY, index, generator.random() < (0.1 if hard else 0.9))
+    elapsed = time.perf_counter() - start
+    print(f"record x{args.draws:<18}{elapsed / args.draws * 1e6:10.2f} us/answer")
+
+    start = time.perf_counter()
+    hard_draws = 0
+    for _ in range(args.draws):
+        hard_draws += selector.draw(stats) % 10 == 0
+    elapsed = time.perf_counter() - start
+    print(f"draw x{args.draws:<20}{elapsed / args.draws * 1e6:10.2f} us/draw")
+
+    start = time.perf_counter()
+    for _ in range(args.sessions):
+        sampler = selector.sampler(CATEGORY, questions)
+        for _ in range(args.per_session):
+            sampler.draw()
+    elapsed = time.perf_counter() - start
+    print(f"sessions x{args.sessions:<16}{elapsed / args.sessions * 1e3:10.3f} ms/session of {args.per_session}")
+
+    small = selector.sampler("Small", range(10))
+    drawn = [small.draw() for _ in range(11)]
+    print(f"hard questions drawn {hard_draws / args.draws:.1%} (10% of the bank), "
+          f"small category drawn once each: {sorted(drawn[:10]) == list(range(10)) and drawn[10] is None}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Generates synthetic users.json, quiz_categories.json and leaderboard.json files.
+
+The files have the same layout as the ones the quiz writes (indent=4) and are
+streamed to disk, so scales of 10M rows need little memory. Every user's
+password is "secret", hashed once with a cheap PBKDF2 setting so that logins
+in benchmarks measure the lookup rather than the key derivation.
+
+Usage: python benchmarks/datagen.py DIRECTORY [--users N] [--questions N] [--scores N] [--categories N]
+Counts accept k/m suffixes, e.g. --users 10m.
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import PasswordHasher
+
+PASSWORD = "secret"
+# Pass this to UserManager as well, or every login re-hashes with the default cost and rewrites users.json.
+HASHER = PasswordHasher(iterations=1000)
+OPTION_POOL = [f"Answer {number}" for number in range(200)] + ["True", "False", "All of the above", "None of the above"]
+
+
+def parse_count(text):
+    """Parses counts such as 1000, 10k or 2.5m."""
+    text = text.strip().lower()
+    multiplier = {"k": 1000, "m": 1000000}.get(text[-1:], 1)
+    if multiplier != 1:
+        text = text[:-1]
+    return int(float(text) * multiplier)
+
+
+def username(number):
+    return f"user{number}"
+
+
+def category_name(number):
+    return f"Category {number}"
+
+
+def write_users(path, count):
+    password = HASHER.hash(PASSWORD)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{\n    "users": [')
+        for number in range(count):
+            file.write(
+                f'{"," if number else ""}\n        {{\n'
+                f'            "email": "{username(number)}@example.com",\n'
+                f'            "username": "{username(number)}",\n'
+                f'            "password": "{password}"\n'
+                f'        }}'
+            )
+        file.write("\n    ]\n}")
+
+
+def write_categories(path, questions, categories, seed=0):
+    generator = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write('{\n    "categories": [')
+        for category in range(categories):
+            first = questions * category // categories
+            last = questions * (category + 1) // categories
+            file.write(
+                f'{"," if category else ""}\n        {{\n'
+                f'            "name": "{category_name(category)}",\n'
+                f'            "questions": ['
+            )
+            for number in range(first, last):
+                options = generator.sample(OPTION_POOL, 4)
+                option_text = ",\n".join(f'                        "{option}"' for option in options)
+                file.write(
+                    f'{"," if number > first else ""}\n                {{\n'
+                    f'                    "question": "Question {number}: which answer is correct?",\n'
+                    f'                    "options": [\n{option_text}\n                    ],\n'
+                    f'                    "correct_answer": "{generator.choice(options)}"\n'
+                    f'                }}'
+                )
+            file.write("\n            ]\n        }")
+        file.write("\n    ]\n}")
+
+
+def write_leaderboard(path, scores, categories, seed=0):
+    """Writes `scores` entries spread evenly over the categories."""
+    generator = random.Random(seed)
+    with open(path, "w", encoding="utf-8") as file:
+        file.write("{")
+        for category in range(categories):
+            count = scores * (category + 1) // categories - scores * category // categories
+            file.write(f'{"," if category else ""}\n    "{category_name(category)}": {{')
+            for number in range(count):
+                file.write(f'{"," if number else ""}\n        "{username(number)}": {generator.randrange(0, 1001, 10)}')
+            file.write("\n    }")
+        file.write("\n}")
+
+
+def generate(directory, users, questions, scores, categories, seed=0):
+    """Writes the three data files into `directory` and returns their paths."""
+    os.makedirs(directory, exist_ok=True)
+    paths = {
+        "users": os.path.join(directory, "users.json"),
+        "categories": os.path.join(directory, "quiz_categories.json"),
+        "leaderboard": os.path.join(directory, "leaderboard.json"),
+    }
+    write_users(paths["users"], users)
+    write_categories(paths["categories"], questions, categories, seed)
+    write_leaderboard(paths["leaderboard"], scores, categories, seed)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--users", type=parse_count, default=1000)
+    parser.add_argument("--questions", type=parse_count, default=1000)
+    parser.add_argument("--scores", type=parse_count, default=1000, help="leaderboard entries over all categories")
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    paths = generate(args.directory, args.users, args.questions, args.scores, args.categories, args.seed)
+    for name, path in paths.items():
+        print(f"{name:<12} {os.path.getsize(path) / 1e6:10.1f} MB  {path}")
+
+
+if __name__ == "__main__":
+    main()
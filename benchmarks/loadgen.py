@@ -0,0 +1,208 @@
+"""Localhost load generator for quiz_server.py.
+
+Each simulated player registers, starts a session and answers questions as
+fast as the server responds, over its own keep-alive connection. Reports
+answer latency percentiles and answers per second.
+
+Usage:
+    python benchmarks/loadgen.py --spawn [--players N] [--watchers N] [--stalled N]
+    python benchmarks/loadgen.py --port 8080 [--players N]
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+class Client:
+    """Minimal HTTP/1.1 keep-alive JSON client."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method, path, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.writer.write(
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
+        )
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    def close(self):
+        self.writer.close()
+
+
+async def open_websocket(host, port, category, receive_buffer=None):
+    """Opens a WebSocket on the category and returns its (reader, writer) after the handshake."""
+    sock = socket.create_connection((host, port))
+    if receive_buffer is not None:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, receive_buffer)
+    reader, writer = await asyncio.open_connection(sock=sock)
+    key = base64.b64encode(os.urandom(16)).decode("ascii")
+    path = "/ws?category=" + category.replace(" ", "%20")
+    writer.write(
+        f"GET {path} HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n".encode("latin-1")
+    )
+    while (await reader.readline()) not in (b"\r\n", b""):
+        pass
+    return reader, writer
+
+
+async def watch(host, port, category, received):
+    """Opens a WebSocket on the category and counts the pushed updates."""
+    reader, writer = await open_websocket(host, port, category)
+    try:
+        while True:
+            header = await reader.readexactly(2)
+            length = header[1] & 0x7F
+            if length == 126:
+                length = int.from_bytes(await reader.readexactly(2), "big")
+            elif length == 127:
+                length = int.from_bytes(await reader.readexactly(8), "big")
+            await reader.readexactly(length)
+            received[0] += 1
+    except (asyncio.IncompleteReadError, asyncio.CancelledError):
+        writer.close()
+
+
+async def stall(host, port, category):
+    """Opens a WebSocket on the category and never reads from it, like a client on a dead link."""
+    _, writer = await open_websocket(host, port, category, receive_buffer=4096)
+    try:
+        await asyncio.Event().wait()
+    except asyncio.CancelledError:
+        writer.close()
+
+
+async def player(host, port, number, categories, latencies):
+    client = Client(host, port)
+    await client.connect()
+    identifier = f"loadgen{number}"
+    await client.request("POST", "/register", {
+        "email": f"{identifier}@example.com", "username": identifier, "password": "secret",
+    })
+    status, state = await client.request("POST", "/sessions", {
+        "identifier": identifier, "password": "secret", "category": random.choice(categories),
+    })
+    question = state.get("question")
+    while question is not None:
+        began = time.perf_counter()
+        status, result = await client.request(
+            "POST", f"/sessions/{state['session_id']}/answer", {"option": random.choice(question["options"])}
+        )
+        latencies.append(time.perf_counter() - began)
+        question = result.get("question")
+    await client.request("DELETE", f"/sessions/{state['session_id']}")
+    client.close()
+
+
+async def run(args):
+    client = Client(args.host, args.port)
+    await client.connect()
+    _, body = await client.request("GET", "/categories")
+    client.close()
+    categories = body["categories"]
+
+    received = [0]
+    watchers = [
+        asyncio.create_task(watch(args.host, args.port, categories[i % len(categories)], received))
+        for i in range(args.watchers)
+    ]
+    watchers += [
+        asyncio.create_task(stall(args.host, args.port, categories[i % len(categories)])) for i in range(args.stalled)
+    ]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(player(args.host, args.port, i, categories, latencies) for i in range(args.players)))
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0.2)
+    for task in watchers:
+        task.cancel()
+
+    latencies.sort()
+    print(f"{args.players} players, {len(latencies)} answers in {elapsed:.2f} s: {len(latencies) / elapsed:.0f} answers/s")
+    print(f"answer latency p50 {latencies[len(latencies) // 2] * 1000:.2f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms")
+    if args.watchers:
+        print(f"{args.watchers} WebSocket watchers received {received[0]} rank updates")
+
+
+def spawn_server(directory, questions):
+    """Starts quiz_server.py on a free port with a generated question bank."""
+    bank = {"categories": [
+        {"name": f"Category {c}", "questions": [
+            {"question": f"Question {q}?", "options": ["A", "B", "C", "D"], "correct_answer": "A"}
+            for q in range(questions)
+        ]}
+        for c in range(4)
+    ]}
+    with open(os.path.join(directory, "quiz_categories.json"), "w", encoding="utf-8") as file:
+        json.dump(bank, file)
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    process = subprocess.Popen([
+        sys.executable, os.path.join(ROOT, "quiz_server.py"),
+        "--port", str(port), "--data-dir", directory, "--journal", "--quiet",
+        # Keep password hashing cheap so the run measures the quiz path.
+        "--password-iterations", "1000",
+    ])
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("The quiz server did not start.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--players", type=int, default=200)
+    parser.add_argument("--watchers", type=int, default=10, help="WebSocket clients watching rank updates")
+    parser.add_argument("--stalled", type=int, default=0, help="WebSocket clients that never read their updates")
+    parser.add_argument("--spawn", action="store_true", help="start a server on generated data for the run")
+    parser.add_argument("--questions", type=int, default=20, help="questions per category when spawning")
+    args = parser.parse_args()
+
+    if not args.spawn:
+        asyncio.run(run(args))
+        return
+    with tempfile.TemporaryDirectory() as directory:
+        process, args.port = spawn_server(directory, args.questions)
+        try:
+            asyncio.run(run(args))
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == "__main__":
+    main()
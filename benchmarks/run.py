@@ -0,0 +1,273 @@
+"""Benchmark harness for the quiz data classes at a configurable scale.
+
+Generates synthetic data with datagen.py in a temporary directory, then
+times UserManager, QuizCategory, Leaderboard and headless QuizWorkflow
+sessions with scripted answers. Results are written as JSON together with
+the git commit they were measured on. With --compare, each result is
+checked against an earlier run.
+
+Usage:
+    python benchmarks/run.py [--scale 100k] [--output results.json]
+    python benchmarks/run.py --scale 100k --compare baseline.json [--threshold 0.2]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import datagen
+from question_pack import compile_pack
+from quiz import Leaderboard, QuizCategory, QuizWorkflow, UserManager
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def git_revision():
+    """Returns (commit, dirty) of the working tree, or (None, None) outside git."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        status = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit, bool(status.strip())
+
+
+class Context:
+    """Data paths, options and the objects that scenarios share."""
+
+    def __init__(self, paths, args):
+        self.paths = paths
+        self.args = args
+        self.random = random.Random(args.seed)
+        self.directory = os.path.dirname(paths["users"])
+
+
+def sample_usernames(context, count):
+    return [datagen.username(context.random.randrange(context.args.users)) for _ in range(count)]
+
+
+def users_load(context):
+    context.user_manager = UserManager(context.paths["users"], hasher=datagen.HASHER)
+    return context.args.users
+
+
+def users_login(context):
+    for identifier in sample_usernames(context, context.args.operations):
+        context.user_manager.login(identifier, datagen.PASSWORD)
+    return context.args.operations
+
+
+def users_register(context):
+    for number in range(context.args.writes):
+        name = f"new{number}"
+        context.user_manager.register(f"{name}@example.com", name, datagen.PASSWORD)
+    return context.args.writes
+
+
+def categories_load(context):
+    quiz_category = QuizCategory(context.paths["categories"])
+    return sum(len(category["questions"]) for category in quiz_category.categories)
+
+
+def categories_lazy(context):
+    quiz_category = QuizCategory(context.paths["categories"], lazy=True)
+    for name in quiz_category.category_names():
+        quiz_category.get_questions(name)[0]
+    return len(quiz_category.categories)
+
+
+def categories_pack_compile(context):
+    QuizCategory(context.paths["categories"], lazy=True)
+    compile_pack(context.paths["categories"])
+    return context.args.questions
+
+
+def categories_pack_open(context):
+    quiz_category = QuizCategory(context.paths["categories"], pack=True)
+    for name in quiz_category.category_names():
+        quiz_category.get_questions(name)[0]
+    return len(quiz_category.categories)
+
+
+def leaderboard_load(context):
+    context.leaderboard = Leaderboard(context.paths["leaderboard"], journal=True, fsync=False)
+    return context.args.scores
+
+
+def leaderboard_index(context):
+    for category in range(context.args.categories):
+        context.leaderboard.get_index(datagen.category_name(category))
+    return context.args.scores
+
+
+def leaderboard_get_rank(context):
+    per_category = max(1, context.args.scores // context.args.categories)
+    for _ in range(context.args.operations):
+        category = datagen.category_name(context.random.randrange(context.args.categories))
+        context.leaderboard.get_rank(category, datagen.username(context.random.randrange(per_category)))
+    return context.args.operations
+
+
+def leaderboard_update(context):
+    for identifier in sample_usernames(context, context.args.operations):
+        category = datagen.category_name(context.random.randrange(context.args.categories))
+        context.leaderboard.update_leaderboard(category, identifier, context.random.randrange(0, 1001, 10))
+    return context.args.operations
+
+
+def leaderboard_listing(context):
+    """Full listings and top-10 snapshots of random categories, as leaderboard watchers request them."""
+    for number in range(context.args.operations):
+        category = datagen.category_name(context.random.randrange(context.args.categories))
+        if number % 10:
+            context.leaderboard.get_top(category, 10)
+        else:
+            context.leaderboard.get_full_leaderboard(category)
+    return context.args.operations
+
+
+def leaderboard_save(context):
+    context.leaderboard.save_leaderboard()
+    return sum(len(scores) for scores in context.leaderboard.data.values())
+
+
+def workflow_sessions(context):
+    """Runs headless QuizWorkflow sessions that answer up to --answers questions each."""
+    quiz_category = QuizCategory(context.paths["categories"], lazy=True)
+    leaderboard = Leaderboard(os.path.join(context.directory, "workflow.json"), journal=True, fsync=False)
+    answered = 0
+    for identifier in sample_usernames(context, context.args.sessions):
+        category = context.random.randrange(context.args.categories)
+        questions = len(quiz_category.get_questions(datagen.category_name(category)))
+        count = min(questions, context.args.answers)
+        script = [identifier, datagen.PASSWORD, str(category + 1)]
+        script += [str(context.random.randint(1, 4)) for _ in range(count)]
+        if count < questions:
+            script.append("-1")
+        answers = iter(script)
+        workflow = QuizWorkflow(context.user_manager, quiz_category, leaderboard,
+                                input_func=lambda prompt: next(answers), output_func=lambda *values: None)
+        workflow.start_quiz()
+        answered += count
+    leaderboard.close()
+    return answered
+
+
+SCENARIOS = [
+    ("users.load", users_load),
+    ("users.login", users_login),
+    ("users.register", users_register),
+    ("categories.load", categories_load),
+    ("categories.lazy_open", categories_lazy),
+    ("categories.pack_compile", categories_pack_compile),
+    ("categories.pack_open", categories_pack_open),
+    ("leaderboard.load", leaderboard_load),
+    ("leaderboard.index_build", leaderboard_index),
+    ("leaderboard.get_rank", leaderboard_get_rank),
+    ("leaderboard.update_journal", leaderboard_update),
+    ("leaderboard.listing", leaderboard_listing),
+    ("leaderboard.save", leaderboard_save),
+    ("workflow.answers", workflow_sessions),
+]
+
+
+def compare(results, baseline_path, threshold):
+    """Prints the change against an earlier run; returns the names that slowed down beyond `threshold`."""
+    with open(baseline_path, "r", encoding="utf-8") as file:
+        baseline = {result["name"]: result for result in json.load(file)["results"]}
+    regressions = []
+    for result in results:
+        previous = baseline.get(result["name"])
+        if previous is None:
+            continue
+        change = result["per_second"] / previous["per_second"] - 1
+        marker = ""
+        if change < -threshold:
+            marker = "  REGRESSION"
+            regressions.append(result["name"])
+        print(f"{result['name']:<28}{change:+8.1%}{marker}", file=sys.stderr)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=datagen.parse_count, default=10000,
+                        help="default for --users, --questions and --scores (1k to 10m)")
+    parser.add_argument("--users", type=datagen.parse_count)
+    parser.add_argument("--questions", type=datagen.parse_count)
+    parser.add_argument("--scores", type=datagen.parse_count)
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--operations", type=int, default=10000, help="logins, rank lookups and score updates")
+    parser.add_argument("--writes", type=int, default=20, help="registrations, each of which rewrites users.json")
+    parser.add_argument("--sessions", type=int, default=200, help="headless QuizWorkflow sessions")
+    parser.add_argument("--answers", type=int, default=20, help="questions answered per session")
+    parser.add_argument("--only", help="comma-separated scenario name prefixes to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON results here instead of to stdout")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="slowdown that --compare reports as a regression")
+    args = parser.parse_args()
+    for name in ("users", "questions", "scores"):
+        if getattr(args, name) is None:
+            setattr(args, name, args.scale)
+    prefixes = args.only.split(",") if args.only else [""]
+
+    commit, dirty = git_revision()
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        started = time.perf_counter()
+        paths = datagen.generate(directory, args.users, args.questions, args.scores, args.categories, args.seed)
+        print(f"generated data in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+        context = Context(paths, args)
+        for name, scenario in SCENARIOS:
+            # Later scenarios reuse the objects earlier ones load, so those always run.
+            if not any(name.startswith(prefix) for prefix in prefixes) and not name.endswith(".load"):
+                continue
+            with contextlib.redirect_stdout(io.StringIO()):
+                started = time.perf_counter()
+                operations = scenario(context)
+                seconds = time.perf_counter() - started
+            if not any(name.startswith(prefix) for prefix in prefixes):
+                continue
+            results.append({
+                "name": name, "operations": operations, "seconds": seconds, "per_second": operations / seconds,
+            })
+            print(f"{name:<28}{operations:>10} ops {seconds:10.3f} s {operations / seconds:14.0f} /s", file=sys.stderr)
+        if hasattr(context, "leaderboard"):
+            context.leaderboard.close()
+
+    report = {
+        "commit": commit,
+        "dirty": dirty,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            name: getattr(args, name)
+            for name in ("users", "questions", "scores", "categories", "operations", "writes", "sessions", "answers", "seed")
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+        print()
+    if args.compare and compare(results, args.compare, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Multi-process stress test for the JSON stores.
+
+Several worker processes share one data directory and interleave user
+registrations, question additions and leaderboard updates. Afterwards every
+user, question and final score must be present, including scores that a
+later update lowered. Exits with status 1 if any update was lost.
+
+Usage: python benchmarks/stress_multiprocess.py [--workers N] [--operations N] [--lazy]
+"""
+import argparse
+import contextlib
+import io
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from quiz import Leaderboard, PasswordHasher, QuizCategory, UserManager
+
+SHARED_CATEGORY = "Shared"
+
+
+def paths(directory):
+    return (os.path.join(directory, "users.json"), os.path.join(directory, "quiz_categories.json"),
+            os.path.join(directory, "leaderboard.json"))
+
+
+def final_score(worker, operation):
+    # Every fourth player ends at 0, like a session restarted after a higher score.
+    if operation % 4 == 3:
+        return 0
+    return 10 * (worker + operation + 1)
+
+
+def work(directory, worker, operations, lazy):
+    user_file, category_file, leaderboard_file = paths(directory)
+    with contextlib.redirect_stdout(io.StringIO()):
+        user_manager = UserManager(user_file, hasher=PasswordHasher(iterations=1000))
+        quiz_category = QuizCategory(category_file, lazy=lazy)
+        leaderboard = Leaderboard(leaderboard_file)
+        own_category = f"Worker {worker}"
+        quiz_category.add_category(own_category)
+        for operation in range(operations):
+            username = f"user{worker}_{operation}"
+            user_manager.register(f"{username}@example.com", username, "secret")
+            quiz_category.add_question(SHARED_CATEGORY, f"Question {worker}.{operation}?", ["A", "B"], "A")
+            quiz_category.add_question(own_category, f"Own question {operation}?", ["A", "B"], "B")
+            # Two updates per player; the later one must survive whether it raises or lowers the score.
+            leaderboard.update_leaderboard(SHARED_CATEGORY, username, 50)
+            leaderboard.update_leaderboard(SHARED_CATEGORY, username, final_score(worker, operation))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--operations", type=int, default=50, help="users, questions and scores written per worker")
+    parser.add_argument("--lazy", action="store_true", help="run QuizCategory in lazy mode")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        user_file, category_file, leaderboard_file = paths(directory)
+        with contextlib.redirect_stdout(io.StringIO()):
+            QuizCategory(category_file).add_category(SHARED_CATEGORY)
+            # Created before the workers run, so it has to pick up their users on its own.
+            early_manager = UserManager(user_file, hasher=PasswordHasher(iterations=1000))
+
+        start = time.perf_counter()
+        workers = [
+            multiprocessing.Process(target=work, args=(directory, worker, args.operations, args.lazy))
+            for worker in range(args.workers)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join()
+        elapsed = time.perf_counter() - start
+        if any(process.exitcode for process in workers):
+            sys.exit("A worker process failed.")
+
+        expected = args.workers * args.operations
+        users = UserManager(user_file).users
+        quiz_category = QuizCategory(category_file)
+        shared = quiz_category.get_questions(SHARED_CATEGORY)
+        own = sum(len(quiz_category.get_questions(f"Worker {worker}") or []) for worker in range(args.workers))
+        scores = Leaderboard(leaderboard_file).data.get(SHARED_CATEGORY, {})
+        wrong_scores = sum(
+            scores.get(f"user{worker}_{operation}") != final_score(worker, operation)
+            for worker in range(args.workers) for operation in range(args.operations)
+        )
+        with contextlib.redirect_stdout(io.StringIO()):
+            late_login = early_manager.login(f"user{args.workers - 1}_0", "secret")
+
+        print(f"{args.workers} processes x {args.operations} operations in {elapsed:.2f} s")
+        print(f"users {len(users)}/{expected}, shared questions {len(shared)}/{expected}, "
+              f"own questions {own}/{expected}, correct scores {expected - wrong_scores}/{expected}, "
+              f"login through an older process {'ok' if late_login else 'failed'}")
+        if (len(users), len(shared), own, wrong_scores, late_login) != (expected, expected, expected, 0, True):
+            print("Updates were lost.")
+            sys.exit(1)
+        print("No updates were lost.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Optional timers and counters around the quiz hot paths.
+
+Nothing is wrapped unless instrumentation is switched on, so a normal run
+pays no overhead. When it is on, the methods listed in HOT_PATHS are
+replaced by timing wrappers, those in ASYNC_PATHS are timed until the
+Future they return is done, and a background thread periodically writes
+the metrics to a local file: Prometheus text format if the file name ends
+in .prom, JSON otherwise. A cProfile capture of the whole run can be taken
+as well.
+
+Switch it on with the --metrics PATH / --profile PATH flags of quiz.py and
+quiz_server.py, or the QUIZ_METRICS / QUIZ_PROFILE environment variables.
+"""
+import contextlib
+import cProfile
+import functools
+import json
+import os
+import threading
+import time
+
+# Methods timed per class, and module-level functions.
+HOT_PATHS = {
+    "UserManager": ["login", "login_candidates", "load_users", "save_users"],
+    "QuizCategory": ["load_categories", "save_categories", "import_questions"],
+    "Leaderboard": ["load_leaderboard", "save_leaderboard", "get_rank", "update_leaderboard", "flush", "compact"],
+    "QuizEngine": ["answer"],
+    "Interface": ["show_question"],
+}
+HOT_FUNCTIONS = ["check_password"]
+# Methods that return a concurrent.futures.Future; the front ends log in and
+# register through these, and check_password may run in a child process
+# where the HOT_FUNCTIONS wrapper does not apply.
+ASYNC_PATHS = {
+    "UserManager": ["login_async", "register_async"],
+}
+
+class Metrics:
+    """Thread-safe call counts, error counts and durations per instrumented name."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.timers = {}
+        self.errors = {}
+        self.started = time.time()
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timer = self.timers.get(name)
+            if timer is None:
+                self.timers[name] = [1, seconds, seconds]
+            else:
+                timer[0] += 1
+                timer[1] += seconds
+                if seconds > timer[2]:
+                    timer[2] = seconds
+
+    def count_error(self, name):
+        with self._lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def snapshot(self):
+        """Returns the metrics as a JSON-serializable dictionary."""
+        with self._lock:
+            timers = {name: list(values) for name, values in self.timers.items()}
+            errors = dict(self.errors)
+        return {
+            "timestamp": time.time(),
+            "uptime_seconds": time.time() - self.started,
+            "calls": {
+                name: {
+                    "count": count,
+                    "total_seconds": total,
+                    "mean_seconds": total / count,
+                    "max_seconds": maximum,
+                    "errors": errors.get(name, 0),
+                }
+                for name, (count, total, maximum) in sorted(timers.items())
+            },
+        }
+
+    def to_prometheus(self):
+        """Returns the metrics in the Prometheus text exposition format."""
+        calls = self.snapshot()["calls"]
+        lines = [
+            "# HELP quiz_call_duration_seconds Time spent in instrumented quiz methods.",
+            "# TYPE quiz_call_duration_seconds summary",
+        ]
+        for name, call in calls.items():
+            lines.append(f'quiz_call_duration_seconds_count{{method="{name}"}} {call["count"]}')
+            lines.append(f'quiz_call_duration_seconds_sum{{method="{name}"}} {call["total_seconds"]:.9f}')
+        lines += [
+            "# HELP quiz_call_duration_max_seconds Slowest call of each instrumented quiz method.",
+            "# TYPE quiz_call_duration_max_seconds gauge",
+        ]
+        lines += [f'quiz_call_duration_max_seconds{{method="{name}"}} {call["max_seconds"]:.9f}' for name, call in calls.items()]
+        lines += [
+            "# HELP quiz_call_errors_total Calls of instrumented quiz methods that raised.",
+            "# TYPE quiz_call_errors_total counter",
+        ]
+        lines += [f'quiz_call_errors_total{{method="{name}"}} {call["errors"]}' for name, call in calls.items()]
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Writes the metrics to `path`, atomically replacing the previous dump."""
+        text = self.to_prometheus() if path.endswith(".prom") else json.dumps(self.snapshot(), indent=4)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            file.write(text)
+        os.replace(temp_path, path)
+
+def timed(metrics, name, function):
+    """Wraps `function` so that every call is timed under `name`."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        except BaseException:
+            metrics.count_error(name)
+            raise
+        finally:
+            metrics.observe(name, time.perf_counter() - started)
+    wrapper.instrumented = True
+    return wrapper
+
+def timed_future(metrics, name, function):
+    """Wraps `function`, which returns a Future, so that every call is timed under `name` until the Future is done."""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            future = function(*args, **kwargs)
+        except BaseException:
+            metrics.count_error(name)
+            metrics.observe(name, time.perf_counter() - started)
+            raise
+
+        def record(done):
+            if done.cancelled() or done.exception() is not None:
+                metrics.count_error(name)
+            metrics.observe(name, time.perf_counter() - started)
+        future.add_done_callback(record)
+        return future
+    wrapper.instrumented = True
+    return wrapper
+
+def instrument(module, metrics):
+    """Replaces the hot paths of `module` by timing wrappers; returns a function that restores them."""
+    patched = []
+    for paths, wrap in ((HOT_PATHS, timed), (ASYNC_PATHS, timed_future)):
+        for class_name, method_names in paths.items():
+            cls = getattr(module, class_name, None)
+            for method_name in method_names if cls is not None else []:
+                original = cls.__dict__.get(method_name)
+                if original is None or getattr(original, "instrumented", False):
+                    continue
+                setattr(cls, method_name, wrap(metrics, f"{class_name}.{method_name}", original))
+                patched.append((cls, method_name, original))
+    for function_name in HOT_FUNCTIONS:
+        original = getattr(module, function_name, None)
+        if original is None or getattr(original, "instrumented", False):
+            continue
+        setattr(module, function_name, timed(metrics, function_name, original))
+        patched.append((module, function_name, original))
+
+    def restore():
+        for owner, name, original in reversed(patched):
+            setattr(owner, name, original)
+    return restore
+
+class MetricsDumper:
+    """Background thread that writes the metrics every `interval` seconds, and once more on stop."""
+
+    def __init__(self, metrics, path, interval=10.0):
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        self.metrics.write(self.path)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.metrics.write(self.path)
+
+@contextlib.contextmanager
+def session(module, metrics_path=None, profile_path=None, interval=10.0):
+    """Instruments `module` and/or profiles the block, as configured.
+
+    The paths fall back to the QUIZ_METRICS and QUIZ_PROFILE environment
+    variables; with neither set, the block runs untouched. The profile covers
+    the thread that runs the block and is written with pstats' dump format.
+    Yields the Metrics object, or None when metrics are off.
+    """
+    metrics_path = metrics_path or os.environ.get("QUIZ_METRICS")
+    profile_path = profile_path or os.environ.get("QUIZ_PROFILE")
+    metrics = dumper = restore = profiler = None
+    if metrics_path:
+        metrics = Metrics()
+        restore = instrument(module, metrics)
+        dumper = MetricsDumper(metrics, metrics_path, interval).start()
+    if profile_path:
+        profiler = cProfile.Profile()
+        profiler.enable()
+    try:
+        yield metrics
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if dumper is not None:
+            dumper.stop()
+            restore()
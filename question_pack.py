@@ -0,0 +1,235 @@
+"""Compact binary question packs compiled from quiz_categories.json.
+
+A pack is read through mmap; questions are decoded one at a time when they
+are accessed, so opening a pack costs the same for ten questions or ten
+million. The JSON file stays the editable source and the pack records the
+size and modification time of the file it was built from.
+
+Layout (little-endian):
+
+    header          HEADER
+    categories      CATEGORY per category: name string, first question, question count
+    questions       QUESTION per question: text string, first option ref, option count,
+                    correct option index (-1 if not among the options), correct-answer string
+    option refs     u32 string id per option
+    string offsets  u64 per string, plus one end offset
+    string data     UTF-8 bytes
+
+Usage: python question_pack.py [quiz_categories.json] [-o quiz_categories.qpk]
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+MAGIC = b"QPK1"
+VERSION = 1
+HEADER = struct.Struct("<4sIIIIIQQ5Q")
+CATEGORY = struct.Struct("<III")
+QUESTION = struct.Struct("<IIHhI")
+OPTION = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+
+def pack_path_for(category_file):
+    """Returns the pack file that belongs to a question bank."""
+    return os.path.splitext(category_file)[0] + ".qpk"
+
+def source_signature(category_file):
+    """Returns the (size, mtime_ns) pair a pack records for its source file."""
+    stat = os.stat(category_file)
+    return stat.st_size, stat.st_mtime_ns
+
+def pack_is_stale(category_file, pack_file):
+    """Returns True if the pack is missing, unreadable or built from another version of the source."""
+    try:
+        with open(pack_file, "rb") as file:
+            header = file.read(HEADER.size)
+    except FileNotFoundError:
+        return True
+    if len(header) != HEADER.size:
+        return True
+    magic, version, _, _, _, _, size, mtime_ns, *_ = HEADER.unpack(header)
+    return magic != MAGIC or version != VERSION or (size, mtime_ns) != source_signature(category_file)
+
+def iter_categories(category_file, spans=None):
+    """Yields (name, questions) for each category of the JSON source.
+
+    With byte spans from `scan_category_offsets`, categories are parsed one at
+    a time; otherwise the whole file is loaded.
+    """
+    if spans is None:
+        with open(category_file, "r", encoding="utf-8") as file:
+            for category in json.load(file).get("categories", []):
+                yield category["name"], category.get("questions", [])
+        return
+    with open(category_file, "rb") as file:
+        for name, start, end in spans:
+            file.seek(start)
+            yield name, json.loads(file.read(end - start)).get("questions", [])
+
+def compile_pack(category_file, pack_file=None, spans=None):
+    """Compiles the JSON question bank into a pack and returns the pack path.
+
+    Category names and option strings are interned in the string table;
+    question texts are stored once each.
+    """
+    pack_file = pack_file or pack_path_for(category_file)
+    signature = source_signature(category_file)
+    categories = bytearray()
+    questions = bytearray()
+    options = bytearray()
+    offsets = bytearray()
+    strings = bytearray()
+    interned = {}
+    counts = {"categories": 0, "questions": 0, "options": 0, "strings": 0}
+
+    def add_string(text):
+        offsets.extend(OFFSET.pack(len(strings)))
+        strings.extend(text.encode("utf-8"))
+        counts["strings"] += 1
+        return counts["strings"] - 1
+
+    def intern(text):
+        string_id = interned.get(text)
+        if string_id is None:
+            string_id = interned[text] = add_string(text)
+        return string_id
+
+    for name, category_questions in iter_categories(category_file, spans):
+        categories.extend(CATEGORY.pack(intern(name), counts["questions"], len(category_questions)))
+        counts["categories"] += 1
+        for question in category_questions:
+            question_options = question["options"]
+            correct_answer = question["correct_answer"]
+            correct_index = question_options.index(correct_answer) if correct_answer in question_options else -1
+            first_option = counts["options"]
+            for option in question_options:
+                options.extend(OPTION.pack(intern(option)))
+            counts["options"] += len(question_options)
+            questions.extend(QUESTION.pack(
+                add_string(question["question"]), first_option, len(question_options), correct_index,
+                intern(correct_answer),
+            ))
+            counts["questions"] += 1
+    offsets.extend(OFFSET.pack(len(strings)))
+
+    section_offsets = []
+    position = HEADER.size
+    for section in (categories, questions, options, offsets):
+        section_offsets.append(position)
+        position += len(section)
+    section_offsets.append(position)
+    header = HEADER.pack(
+        MAGIC, VERSION, counts["categories"], counts["questions"], counts["options"], counts["strings"],
+        *signature, *section_offsets,
+    )
+
+    directory = os.path.dirname(os.path.abspath(pack_file))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(pack_file) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            for section in (header, categories, questions, options, offsets, strings):
+                file.write(section)
+        os.replace(temp_path, pack_file)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    return pack_file
+
+def question_dict(question, options, correct_answer):
+    return {"question": question, "options": options, "correct_answer": correct_answer}
+
+class QuestionPack:
+    """Read-only, memory-mapped view of a compiled question pack.
+
+    Decoded questions are built with `make_question(question, options, correct_answer)`.
+    """
+
+    def __init__(self, pack_file, make_question=question_dict):
+        self.pack_file = pack_file
+        self.make_question = make_question
+        with open(pack_file, "rb") as file:
+            self.buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.category_count, self.question_count, self.option_count, self.string_count,
+         _, _, *sections) = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{pack_file} is not a version {VERSION} question pack.")
+        self.category_offset, self.question_offset, self.option_offset, self.string_table_offset, self.string_data_offset = sections
+        self.categories = {}
+        for index in range(self.category_count):
+            name_id, first, count = CATEGORY.unpack_from(self.buffer, self.category_offset + index * CATEGORY.size)
+            self.categories[self.string(name_id)] = (first, count)
+
+    def category_names(self):
+        """Returns the category names in source order."""
+        return list(self.categories)
+
+    def questions(self, category_name):
+        """Returns a lazy sequence of the category's questions, or None."""
+        span = self.categories.get(category_name)
+        if span is None:
+            return None
+        return PackedQuestions(self, *span)
+
+    def string(self, string_id):
+        """Decodes one entry of the string table."""
+        start, end = struct.unpack_from("<QQ", self.buffer, self.string_table_offset + string_id * OFFSET.size)
+        return self.buffer[self.string_data_offset + start:self.string_data_offset + end].decode("utf-8")
+
+    def question(self, index):
+        """Decodes question `index` with `make_question`."""
+        text_id, first_option, option_count, correct_index, correct_id = QUESTION.unpack_from(
+            self.buffer, self.question_offset + index * QUESTION.size
+        )
+        option_ids = struct.unpack_from(f"<{option_count}I", self.buffer, self.option_offset + first_option * OPTION.size)
+        options = [self.string(option_id) for option_id in option_ids]
+        correct_answer = options[correct_index] if correct_index >= 0 else self.string(correct_id)
+        return self.make_question(self.string(text_id), options, correct_answer)
+
+    def close(self):
+        self.buffer.close()
+
+class PackedQuestions:
+    """Sequence of one category's questions, decoded from the pack on access."""
+
+    def __init__(self, pack, first, count):
+        self.pack = pack
+        self.first = first
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("question index out of range")
+        return self.pack.question(self.first + index)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self.pack.question(self.first + index)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compile a question bank into a binary pack.")
+    parser.add_argument("category_file", nargs="?", default="quiz_categories.json")
+    parser.add_argument("-o", "--output", help="pack file (default: next to the JSON file, with a .qpk extension)")
+    args = parser.parse_args()
+    from quiz import scan_category_offsets
+    with open(args.category_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        spans = scan_category_offsets(buffer)
+    pack_file = compile_pack(args.category_file, args.output, spans)
+    pack = QuestionPack(pack_file)
+    print(f"{pack.question_count} questions in {pack.category_count} categories written to {pack_file}.")
+    pack.close()
+
+if __name__ == "__main__":
+    main()
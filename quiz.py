@@ -1,73 +1,539 @@
+import argparse
+import array
+import atexit
+import base64
+import collections
+import concurrent.futures
+import contextlib
+import csv
+import hashlib
+import hmac
+import itertools
 import json
+import mmap
+import math
+import os
+import random
+import re
+import secrets
+import sys
+import threading
+import time
 import tkinter as tk
 from tkinter import messagebox, simpledialog
 
+from storage import FileLock, atomic_open, atomic_write_json, file_signature, fsync_directory
+
+class PasswordHasher:
+    """Salted password hashing with tunable cost.
+    
+    Hashes are stored as "pbkdf2_sha256$<iterations>$<salt>$<hash>" or
+    "scrypt$<n>$<r>$<p>$<salt>$<hash>", so each one carries the parameters
+    needed to verify it. Anything else is treated as a legacy plaintext password.
+    """
+    def __init__(self, scheme="pbkdf2_sha256", iterations=600000, scrypt_n=2 ** 14, scrypt_r=8, scrypt_p=1):
+        if scheme not in ("pbkdf2_sha256", "scrypt"):
+            raise ValueError(f"Unknown password hashing scheme: {scheme}")
+        self.scheme = scheme
+        self.iterations = iterations
+        self.scrypt_n = scrypt_n
+        self.scrypt_r = scrypt_r
+        self.scrypt_p = scrypt_p
+
+    def hash(self, password):
+        """Returns the encoded hash of the password with a fresh salt."""
+        salt = os.urandom(16)
+        if self.scheme == "scrypt":
+            parameters = [self.scrypt_n, self.scrypt_r, self.scrypt_p]
+        else:
+            parameters = [self.iterations]
+        digest = _derive_key(self.scheme, parameters, salt, password)
+        encoded = [self.scheme, *map(str, parameters), base64.b64encode(salt).decode("ascii"), base64.b64encode(digest).decode("ascii")]
+        return "$".join(encoded)
+
+    def needs_rehash(self, stored):
+        """Returns True if the stored value is plaintext or uses other cost parameters."""
+        parts = stored.split("$")
+        if self.scheme == "scrypt":
+            return parts[:4] != ["scrypt", str(self.scrypt_n), str(self.scrypt_r), str(self.scrypt_p)]
+        return parts[:2] != ["pbkdf2_sha256", str(self.iterations)]
+
+def _derive_key(scheme, parameters, salt, password):
+    if scheme == "scrypt":
+        n, r, p = parameters
+        return hashlib.scrypt(password.encode("utf-8"), salt=salt, n=n, r=r, p=p, maxmem=256 * n * r + (1 << 20))
+    return hashlib.pbkdf2_hmac("sha256", password.encode("utf-8"), salt, parameters[0])
+
+def verify_password(stored, password):
+    """Checks a password against a stored hash or a legacy plaintext value."""
+    parts = stored.split("$")
+    if parts[0] == "pbkdf2_sha256" and len(parts) == 4:
+        parameters, salt, digest = [int(parts[1])], parts[2], parts[3]
+    elif parts[0] == "scrypt" and len(parts) == 6:
+        parameters, salt, digest = [int(value) for value in parts[1:4]], parts[4], parts[5]
+    else:
+        return hmac.compare_digest(stored.encode("utf-8"), password.encode("utf-8"))
+    expected = base64.b64decode(digest)
+    return hmac.compare_digest(_derive_key(parts[0], parameters, base64.b64decode(salt), password), expected)
+
+def check_password(stored, password, hasher):
+    """Verifies the password and returns (matches, new hash or None).
+    
+    A new hash is produced when the stored value is plaintext or was made with
+    other cost parameters. Module level so it can run in a process pool.
+    """
+    if not verify_password(stored, password):
+        return False, None
+    return True, hasher.hash(password) if hasher.needs_rehash(stored) else None
+
 class UserManager:
-    def __init__(self, user_file="users.json"):
+    def __init__(self, user_file="users.json", storage=None, hasher=None, executor=None):
         self.user_file = user_file
+        self.storage = storage
+        self.hasher = hasher or PasswordHasher()
+        # Password checks for login_async run here; a ProcessPoolExecutor can be
+        # passed in to spread them over several cores.
+        self.executor = executor
+        self._lock = threading.RLock()
+        # Serializes writes with other processes that share the JSON file.
+        self._file_lock = FileLock(user_file) if storage is None else contextlib.nullcontext()
+        self._signature = None
         self.users = self.load_users()
 
     def load_users(self):
-        """Loads users from the JSON file."""
+        """Loads users from the JSON file and indexes them by email and username.
+        
+        With a storage backend users are looked up on demand, so nothing is loaded.
+        """
+        users = self._read_users() if self.storage is None else []
+        self.users_by_email = {user["email"]: user for user in users}
+        self.users_by_username = {user["username"]: user for user in users}
+        return users
+        
+    def save_users(self):
+        """Saves the list of users to the JSON file.
+        
+        If another process saved the file since this one last read or wrote
+        it, its users are merged in first; for users known to both, the local
+        record wins. The file is replaced atomically.
+        """
+        with self._lock, self._file_lock:
+            self._refresh_users()
+            atomic_write_json(self.user_file, {"users": self.users}, indent=4)
+            self._signature = file_signature(self.user_file)
+
+    def _read_users(self):
+        self._signature = file_signature(self.user_file)
         try:
             with open(self.user_file, "r") as file:
-                data = json.load(file)
-                return data.get("users", [])
+                return json.load(file).get("users", [])
         except FileNotFoundError:
-            return []    
-        
-    def save_users(self):
-        """Saves the updated list of users to the JSON file."""
-        with open(self.user_file, "w") as file:
-            json.dump({"users": self.users}, file, indent=4)
+            return []
+
+    def _refresh_users(self):
+        """Merges in users saved by other processes, if the file changed since this process last touched it."""
+        with self._lock:
+            if file_signature(self.user_file) != self._signature:
+                self._merge_users(self._read_users())
+
+    def _merge_users(self, users):
+        """Adds the users of another process's save that this process does not know yet."""
+        for user in users:
+            if user["email"] in self.users_by_email or user["username"] in self.users_by_username:
+                continue
+            self.users.append(user)
+            self.users_by_email[user["email"]] = user
+            self.users_by_username[user["username"]] = user
             
     def register(self, email, username, password):
-        """Registers a new user."""
-        if any(user['email'] == email for user in self.users):
-            print("This email address is already registered.")
-            return False
+        """Registers a new user with a hashed password."""
+        return self._add_user(email, username, self.hasher.hash(password))
+
+    def register_async(self, email, username, password):
+        """Starts a registration on the worker pool and returns a Future of the result.
         
-        new_user = {
-            "email": email,
-            "username": username,
-            "password": password
-        }
-        self.users.append(new_user)
-        self.save_users()
+        Like login_async, the password is hashed off the calling thread, so a
+        Tk loop can keep going in the meantime.
+        """
+        result = concurrent.futures.Future()
+
+        def add_user(hashing):
+            try:
+                result.set_result(self._add_user(email, username, hashing.result()))
+            except Exception as error:
+                result.set_exception(error)
+
+        self._get_executor().submit(self.hasher.hash, password).add_done_callback(add_user)
+        return result
+
+    def _add_user(self, email, username, hashed_password):
+        """Stores a new user unless the email or username is taken; returns whether it was added."""
+        with self._lock, self._file_lock:
+            if self.storage is None:
+                # Another process may have registered the same email or username.
+                self._refresh_users()
+            if self.find_user_by_email(email) is not None:
+                print("This email address is already registered.")
+                return False
+            if self.find_user_by_username(username) is not None:
+                print("This username is already taken.")
+                return False
+            
+            new_user = {
+                "email": email,
+                "username": username,
+                "password": hashed_password
+            }
+            if self.storage is not None:
+                self.storage.add_user(new_user)
+            else:
+                self.users.append(new_user)
+                self.users_by_email[email] = new_user
+                self.users_by_username[username] = new_user
+                self.save_users()
         print("Registration successful!")
         return True
+
+    def find_user_by_email(self, email):
+        """Returns the user registered with the given email, or None."""
+        if self.storage is not None:
+            return self.storage.find_user_by_email(email)
+        return self.users_by_email.get(email)
+
+    def find_user_by_username(self, username):
+        """Returns the user registered with the given username, or None."""
+        if self.storage is not None:
+            return self.storage.find_user_by_username(username)
+        return self.users_by_username.get(username)
     
     def login(self, identifier, password):
-        """Logs in a user using either email or username."""
-        for user in self.users:
-            if (user["email"] == identifier or user["username"] == identifier) and user['password'] == password:
-                print("Login successful!")
+        """Logs in a user using either email or username.
+        
+        Legacy plaintext passwords are replaced by a hash on a successful login.
+        """
+        for user in self.login_candidates(identifier):
+            matches, new_hash = check_password(user["password"], password, self.hasher)
+            if matches:
+                self._finish_login(user, new_hash)
                 return True
         print("Invalid email or password.")
         return False
 
+    def login_async(self, identifier, password, candidates=None):
+        """Starts a login on the worker pool and returns a Future of the result.
+        
+        The key derivation runs off the calling thread, so a Tk loop or an
+        event loop can keep going while the password is checked. The user
+        lookup runs on the calling thread unless `candidates`, the result of
+        login_candidates, is passed in; an event loop should look them up in
+        its own thread pool first.
+        """
+        result = concurrent.futures.Future()
+        candidates = list(candidates) if candidates is not None else self.login_candidates(identifier)
+
+        def check_next(previous=None):
+            if previous is not None:
+                try:
+                    matches, new_hash = previous.result()
+                    if matches:
+                        self._finish_login(candidates[0], new_hash)
+                        result.set_result(True)
+                        return
+                except Exception as error:
+                    result.set_exception(error)
+                    return
+                candidates.pop(0)
+            if not candidates:
+                print("Invalid email or password.")
+                result.set_result(False)
+                return
+            future = self._get_executor().submit(check_password, candidates[0]["password"], password, self.hasher)
+            future.add_done_callback(check_next)
+
+        check_next()
+        return result
+
+    def login_candidates(self, identifier):
+        """Returns the users whose email or username is `identifier`, re-reading the file if another process changed it."""
+        if self.storage is None:
+            self._refresh_users()
+        users = []
+        for user in (self.find_user_by_email(identifier), self.find_user_by_username(identifier)):
+            if user is not None and not any(user is other for other in users):
+                users.append(user)
+        return users
+
+    def _finish_login(self, user, new_hash):
+        """Stores an upgraded password hash, if any, and reports the login."""
+        if new_hash is not None:
+            with self._lock:
+                user["password"] = new_hash
+                if self.storage is not None:
+                    self.storage.update_user(user)
+                else:
+                    self.save_users()
+        print("Login successful!")
+
+    def _get_executor(self):
+        with self._lock:
+            if self.executor is None:
+                self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+            return self.executor
+
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]', re.DOTALL)
+
+def scan_category_offsets(buffer):
+    """Returns (name, start, end) byte spans of the category objects in a question bank.
+    
+    Only strings and brackets are tokenized to follow the nesting; questions
+    are never decoded.
+    """
+    spans = []
+    depth = 0
+    start = name = None
+    expect_name = False
+    for match in _JSON_TOKEN.finditer(buffer):
+        token = match.group()
+        first = token[0]
+        if first == 0x22:
+            # Depth 1 is the document, 2 the "categories" list and 3 a category object.
+            if depth == 3:
+                if expect_name:
+                    name = json.loads(token)
+                    expect_name = False
+                elif token == b'"name"':
+                    expect_name = True
+        elif first == 0x7B or first == 0x5B:
+            depth += 1
+            if depth == 3 and first == 0x7B:
+                start = match.start()
+                name = None
+        else:
+            if depth == 3 and first == 0x7D:
+                spans.append((name, start, match.end()))
+            depth -= 1
+    return spans
+
+class Question:
+    """A multiple-choice question.
+
+    The correct answer is stored as an index into `options`, and option
+    strings are interned so that answers such as "True" are shared between
+    questions. A correct answer that is not among the options, which older
+    files may contain, is kept in `unlisted_answer`.
+    """
+    __slots__ = ("question", "options", "correct_index", "unlisted_answer")
+
+    def __init__(self, question, options, correct_answer):
+        self.question = question
+        self.options = tuple(sys.intern(option) for option in options)
+        if correct_answer in self.options:
+            self.correct_index = self.options.index(correct_answer)
+            self.unlisted_answer = None
+        else:
+            self.correct_index = -1
+            self.unlisted_answer = correct_answer
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["question"], data["options"], data["correct_answer"])
+
+    @property
+    def correct_answer(self):
+        if self.correct_index < 0:
+            return self.unlisted_answer
+        return self.options[self.correct_index]
+
+    def to_dict(self):
+        """Returns the question in the JSON file format."""
+        return {"question": self.question, "options": list(self.options), "correct_answer": self.correct_answer}
+
+def validate_question(options, correct_answer):
+    """Returns why a question would be rejected, or None if it is valid."""
+    if len(options) < 2:
+        return "You must enter at least 2 options!"
+    if correct_answer not in options:
+        return "The correct answer must be one of the options!"
+    return None
+
+def question_digest(question):
+    """Hashes question text for duplicate detection."""
+    return hashlib.blake2b(question.strip().encode("utf-8"), digest_size=16).digest()
+
+# Columns of the CSV import/export format; options are separated by OPTION_SEPARATOR.
+QUESTION_CSV_FIELDS = ["category", "question", "options", "correct_answer"]
+OPTION_SEPARATOR = "|"
+
+def question_file_format(path):
+    """Returns "csv" or "jsonl" based on the file extension."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return "csv"
+    if extension in (".jsonl", ".ndjson"):
+        return "jsonl"
+    raise ValueError(f"Unsupported question file format: {path}")
+
+def _question_row(category, question, options, correct_answer):
+    """Returns the fields of an imported row as a tuple, or raises ValueError if one has the wrong type."""
+    for name, value in (("category", category), ("question", question), ("correct answer", correct_answer)):
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"The {name} must be a non-empty string.")
+    return category, question, options, correct_answer
+
+def read_question_rows(path, file_format=None):
+    """Streams (line number, row) pairs from a CSV or JSON Lines question file.
+
+    Each row is a (category, question, options, correct_answer) tuple, or a
+    ValueError describing why the line could not be read.
+    """
+    file_format = file_format or question_file_format(path)
+    with open(path, "r", encoding="utf-8", newline="") as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for record in reader:
+                try:
+                    options = [option.strip() for option in record["options"].split(OPTION_SEPARATOR)]
+                    row = _question_row(record["category"], record["question"], options, record["correct_answer"].strip())
+                except (KeyError, AttributeError):
+                    yield reader.line_num, ValueError("Missing column.")
+                except ValueError as error:
+                    yield reader.line_num, error
+                else:
+                    yield reader.line_num, row
+            return
+        for line_number, line in enumerate(file, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                options = record["options"]
+                if not isinstance(options, list) or not all(isinstance(option, str) for option in options):
+                    raise ValueError("Options must be a list of strings.")
+                row = _question_row(record["category"], record["question"], options, record["correct_answer"])
+            except (KeyError, TypeError):
+                yield line_number, ValueError("Missing field.")
+            except ValueError as error:
+                yield line_number, error
+            else:
+                yield line_number, row
+
 class QuizCategory:
-    def __init__(self, category_file="quiz_categories.json"):
+    def __init__(self, category_file="quiz_categories.json", storage=None, lazy=False, max_resident=8, pack=False):
         self.category_file = category_file
+        self.index_file = category_file + ".idx"
+        self.pack_file = os.path.splitext(category_file)[0] + ".qpk"
+        self.storage = storage
+        # In pack mode questions are read from a binary pack compiled from the JSON
+        # file; edits go through the lazy path and rebuild the pack when saved.
+        self.pack = pack and storage is None
+        self.question_pack = None
+        # In lazy mode `categories` only holds names; questions are loaded on first
+        # access and at most `max_resident` categories are kept in memory.
+        self.lazy = lazy or self.pack
+        self.max_resident = max_resident
+        self.resident = collections.OrderedDict()
+        self.offsets = {}
+        # Serializes writes with other processes that share the JSON file; the
+        # signature tells when one of them has rewritten it.
+        self._file_lock = FileLock(category_file) if storage is None else contextlib.nullcontext()
+        self._signature = None
         self.categories = self.load_categories()
+        if self.pack:
+            self._open_pack()
+        self.categories_by_name = {category["name"]: category for category in self.categories}
     
     def load_categories(self):
-        """Loads categories from the JSON file."""
+        """Loads categories from the JSON file or the storage backend."""
+        if self.lazy:
+            return self._load_category_names()
+        categories = self.storage.load_categories() if self.storage is not None else self._read_category_file()
+        for category in categories:
+            category["questions"] = [Question.from_dict(question) for question in category["questions"]]
+        return categories
+    
+    def save_categories(self):
+        """Saves the category list to the JSON file.
+        
+        Categories and questions that other processes have saved in the
+        meantime are merged in first, and the file is replaced atomically.
+        """
+        with self._file_lock:
+            if self.lazy:
+                self._save_lazy()
+                if self.pack:
+                    self._open_pack()
+                return
+            if file_signature(self.category_file) != self._signature:
+                for category in self._read_category_file():
+                    self._merge_category(category["name"], [Question.from_dict(question) for question in category["questions"]])
+            atomic_write_json(
+                self.category_file, {"categories": self.categories}, indent=4, ensure_ascii=False, default=Question.to_dict
+            )
+            self._signature = file_signature(self.category_file)
+
+    def _read_category_file(self):
+        self._signature = file_signature(self.category_file)
         try:
             with open(self.category_file, "r", encoding="utf-8") as file:
-                data = json.load(file)
-                return data.get("categories", [])
+                return json.load(file).get("categories", [])
         except FileNotFoundError:
             return []
-    
-    def save_categories(self):
-        """Saves the updated category list to the JSON file."""
-        with open(self.category_file, "w", encoding="utf-8") as file:
-            json.dump({"categories": self.categories}, file, indent=4, ensure_ascii=False)
+
+    def _merge_category(self, category_name, questions):
+        """Merges a category saved by another process; questions are matched by their text."""
+        if category_name not in self.categories_by_name:
+            self.categories.append({"name": category_name} if self.lazy else {"name": category_name, "questions": []})
+            self.categories_by_name[category_name] = self.categories[-1]
+        local = self.categories_by_name[category_name]["questions"] if not self.lazy else self.resident.get(category_name)
+        if local is None:
+            # Not resident: the next load reads the merged category from the file.
+            return
+        known = {question_digest(question.question) for question in local}
+        local.extend(question for question in questions if question_digest(question.question) not in known)
+
+    def category_names(self):
+        """Returns the names of all categories in file order."""
+        return [category["name"] for category in self.categories]
+
+    def get_questions(self, category_name):
+        """Returns the question list of the category, or None if it does not exist."""
+        category = self.categories_by_name.get(category_name)
+        if category is None:
+            return None
+        if not self.lazy:
+            return category["questions"]
+        questions = self.resident.get(category_name)
+        if questions is not None:
+            self.resident.move_to_end(category_name)
+            return questions
+        if self.question_pack is not None:
+            return self.question_pack.questions(category_name)
+        return self._load_questions(category_name)
+
+    def _load_questions(self, category_name):
+        """Parses a category's questions from the backend and keeps them resident."""
+        questions = self._read_questions(category_name)
+        self._make_resident(category_name, questions)
+        return questions
+
+    def _read_questions(self, category_name):
+        """Parses a category's questions from the backend."""
+        if self.storage is not None:
+            questions = self.storage.load_questions(category_name)
+        else:
+            with self._file_lock:
+                self._refresh_offsets()
+                if category_name not in self.offsets:
+                    return []
+                start, end = self.offsets[category_name]
+                with open(self.category_file, "rb") as file:
+                    file.seek(start)
+                    questions = json.loads(file.read(end - start)).get("questions", [])
+        return [Question.from_dict(question) for question in questions]
             
     def add_category(self, name):
         """Adds a new category."""
-        if any(category['name'] == name for category in self.categories):
+        if name in self.categories_by_name:
             print("This category already exists.")
             return False
         
@@ -75,87 +541,1230 @@ class QuizCategory:
             "name": name,
             "questions": []
         }
-        self.categories.append(new_category)
-        self.save_categories()
+        if self.lazy:
+            self.categories.append({"name": name})
+            self._make_resident(name, new_category["questions"])
+        else:
+            self.categories.append(new_category)
+        self.categories_by_name[name] = self.categories[-1]
+        if self.storage is not None:
+            self.storage.add_category(name)
+        else:
+            self.save_categories()
         print("Category added!")
         return True
     
     def add_question(self, category_name, question, options, correct_answer):
         """Adds a new question to the specified category."""
-        for category in self.categories:
-            if category["name"] == category_name:
-                new_question = {
-                    "question": question,
-                    "options": options,
-                    "correct_answer": correct_answer
-                }
-                category["questions"].append(new_question)
-                self.save_categories()
-                print("Question added!")
-                return True
+        questions = self.get_questions(category_name)
+        if questions is None:
+            print("Category not found.")
+            return False
+        if self.pack and category_name not in self.resident:
+            # Pack questions are read-only; edit a parsed copy of the category.
+            questions = self._load_questions(category_name)
         
-        print("Category not found.")
-        return False
+        new_question = Question(question, options, correct_answer)
+        questions.append(new_question)
+        if self.storage is not None:
+            self.storage.add_question(category_name, new_question.to_dict())
+        else:
+            self.save_categories()
+        print("Question added!")
+        return True
+
+    def import_questions(self, path, file_format=None):
+        """Imports questions from a CSV or JSON Lines file and saves them with a single write.
+        
+        Rows are streamed and validated like questions added in the interface.
+        Rows whose question text already exists in the category, or earlier in
+        the file, are skipped. Missing categories are created. Returns a summary
+        with the imported, duplicate and invalid counts and the (line, reason)
+        of each invalid row.
+        """
+        summary = {"imported": 0, "duplicates": 0, "invalid": 0, "errors": []}
+        additions = {}
+        digests = {}
+        for line_number, row in read_question_rows(path, file_format):
+            if isinstance(row, ValueError):
+                summary["invalid"] += 1
+                summary["errors"].append((line_number, str(row)))
+                continue
+            category_name, question, options, correct_answer = row
+            error = validate_question(options, correct_answer)
+            if error is not None:
+                summary["invalid"] += 1
+                summary["errors"].append((line_number, error))
+                continue
+            known = digests.get(category_name)
+            if known is None:
+                existing = self.get_questions(category_name) or []
+                known = digests[category_name] = {question_digest(item.question) for item in existing}
+            digest = question_digest(question)
+            if digest in known:
+                summary["duplicates"] += 1
+                continue
+            known.add(digest)
+            additions.setdefault(category_name, []).append(Question(question, options, correct_answer))
+            summary["imported"] += 1
+        if additions:
+            self._commit_additions(additions)
+        return summary
+
+    def export_questions(self, path, file_format=None):
+        """Writes every question to a CSV or JSON Lines file, one category at a time, and returns the count."""
+        file_format = file_format or question_file_format(path)
+        count = 0
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            writer = csv.writer(file) if file_format == "csv" else None
+            if writer is not None:
+                writer.writerow(QUESTION_CSV_FIELDS)
+            for category_name in self.category_names():
+                for question in self.get_questions(category_name):
+                    if writer is not None:
+                        writer.writerow([
+                            category_name, question.question, OPTION_SEPARATOR.join(question.options), question.correct_answer,
+                        ])
+                    else:
+                        file.write(json.dumps({"category": category_name, **question.to_dict()}, ensure_ascii=False) + "\n")
+                    count += 1
+        return count
+
+    def _commit_additions(self, additions):
+        """Appends new questions to their categories and persists them with one write or transaction."""
+        if self.storage is not None:
+            with self.storage.transaction():
+                for category_name, questions in additions.items():
+                    if category_name not in self.categories_by_name:
+                        self.storage.add_category(category_name)
+                    for question in questions:
+                        self.storage.add_question(category_name, question.to_dict())
+        edited = {}
+        for category_name, questions in additions.items():
+            created = category_name not in self.categories_by_name
+            if created:
+                self.categories.append({"name": category_name} if self.lazy else {"name": category_name, "questions": []})
+                self.categories_by_name[category_name] = self.categories[-1]
+            if not self.lazy:
+                self.categories_by_name[category_name]["questions"].extend(questions)
+                continue
+            existing = self.resident.get(category_name)
+            if existing is None:
+                if self.storage is not None and not created:
+                    # Already persisted; the category is parsed again on its next use.
+                    continue
+                existing = [] if created else self._read_questions(category_name)
+            existing.extend(questions)
+            edited[category_name] = existing
+        # Edited categories stay resident until the save below has written them.
+        for category_name, questions in edited.items():
+            self.resident[category_name] = questions
+            self.resident.move_to_end(category_name)
+        if self.storage is None:
+            self.save_categories()
+        while len(self.resident) > self.max_resident:
+            self.resident.popitem(last=False)
+
+    def _make_resident(self, category_name, questions):
+        """Keeps a category's questions in memory, evicting the least recently used."""
+        self.resident[category_name] = questions
+        self.resident.move_to_end(category_name)
+        while len(self.resident) > self.max_resident:
+            self.resident.popitem(last=False)
+
+    def _load_category_names(self):
+        """Reads category names, and byte offsets for the JSON file, without loading questions."""
+        if self.storage is not None:
+            return [{"name": name} for name in self.storage.load_category_names()]
+        try:
+            stat = os.stat(self.category_file)
+        except FileNotFoundError:
+            return []
+        self._signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        spans = self._read_offset_index(stat)
+        if spans is None:
+            spans = []
+            if stat.st_size:
+                with open(self.category_file, "rb") as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    spans = scan_category_offsets(buffer)
+            self._write_offset_index(spans)
+        self.offsets = {name: (start, end) for name, start, end in spans}
+        return [{"name": name} for name, start, end in spans]
+
+    def _refresh_offsets(self):
+        """Re-reads the category spans if another process has rewritten the JSON file.
+        
+        Must be called with the file lock held. Categories that are resident
+        are merged with their saved versions.
+        """
+        if file_signature(self.category_file) == self._signature:
+            return
+        for category in self._load_category_names():
+            name = category["name"]
+            if name not in self.resident:
+                self._merge_category(name, [])
+                continue
+            start, end = self.offsets[name]
+            with open(self.category_file, "rb") as file:
+                file.seek(start)
+                questions = json.loads(file.read(end - start)).get("questions", [])
+            self._merge_category(name, [Question.from_dict(question) for question in questions])
+
+    def _open_pack(self):
+        """Maps the question pack, compiling it first if the JSON file has changed since it was built."""
+        from question_pack import QuestionPack, compile_pack, pack_is_stale
+        if not os.path.exists(self.category_file):
+            return
+        if pack_is_stale(self.category_file, self.pack_file):
+            spans = [(name, start, end) for name, (start, end) in self.offsets.items()]
+            compile_pack(self.category_file, self.pack_file, spans)
+        # Questions of the previous pack stay readable until nothing references them.
+        self.question_pack = QuestionPack(self.pack_file, Question)
+        self.resident.clear()
+
+    def _read_offset_index(self, stat):
+        """Returns the cached category spans if they still match the JSON file."""
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as file:
+                index = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if index.get("size") != stat.st_size or index.get("mtime_ns") != stat.st_mtime_ns:
+            return None
+        return [tuple(span) for span in index["categories"]]
+
+    def _write_offset_index(self, spans):
+        """Caches the category spans next to the JSON file for the next startup."""
+        stat = os.stat(self.category_file)
+        self._signature = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        index = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "categories": spans}
+        try:
+            atomic_write_json(self.index_file, index, ensure_ascii=False)
+        except OSError:
+            pass
+
+    def _save_lazy(self):
+        """Rewrites the JSON file category by category.
+        
+        Resident categories are serialized from memory; the others are copied
+        byte for byte from the current file, so they never have to be parsed.
+        """
+        self._refresh_offsets()
+        spans = []
+        source = open(self.category_file, "rb") if self.offsets else None
+        try:
+            with atomic_open(self.category_file, "wb") as target:
+                target.write(b'{\n    "categories": [\n')
+                for position, category in enumerate(self.categories):
+                    name = category["name"]
+                    if position:
+                        target.write(b",\n")
+                    if name in self.resident:
+                        text = json.dumps(
+                            {"name": name, "questions": self.resident[name]}, indent=4, ensure_ascii=False,
+                            default=Question.to_dict,
+                        )
+                        chunk = ("        " + text.replace("\n", "\n        ")).encode("utf-8")
+                    else:
+                        start, end = self.offsets[name]
+                        source.seek(start)
+                        chunk = b"        " + source.read(end - start)
+                    offset = target.tell() + 8
+                    target.write(chunk)
+                    spans.append((name, offset, target.tell()))
+                target.write(b"\n    ]\n}")
+        finally:
+            if source is not None:
+                source.close()
+        self.offsets = {name: (start, end) for name, start, end in spans}
+        self._write_offset_index(spans)
+
+class _SkipNode:
+    __slots__ = ("key", "identifier", "score", "next", "width")
+
+    def __init__(self, key, identifier, score, level):
+        self.key = key
+        self.identifier = identifier
+        self.score = score
+        self.next = [None] * level
+        self.width = [1] * level
+
+class RankedIndex:
+    """Order-statistic index over the scores of a single category.
+
+    Entries are kept in an indexable skip list ordered by score, highest
+    first. Players with equal scores are listed in the order in which they
+    reached that score. Ranks follow standard competition ranking: tied
+    players share a rank and the following rank is skipped (1, 2, 2, 4).
+    Updates, rank lookups and positional queries take O(log n) expected time.
+    """
+    MAX_LEVEL = 32
+
+    def __init__(self, scores=None):
+        self.tail = _SkipNode((math.inf,), None, None, 0)
+        self.head = _SkipNode(None, None, None, self.MAX_LEVEL)
+        self.head.next = [self.tail] * self.MAX_LEVEL
+        self.nodes = {}
+        self.size = 0
+        self.sequence = 0
+        for identifier, score in (scores or {}).items():
+            self.set(identifier, score)
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, identifier):
+        return identifier in self.nodes
+
+    def set(self, identifier, score):
+        """Inserts the player or moves them to their new score."""
+        node = self.nodes.get(identifier)
+        if node is not None:
+            if node.score == score:
+                return
+            self._unlink(node.key)
+        self.sequence += 1
+        self.nodes[identifier] = self._link((-score, self.sequence), identifier, score)
+
+    def remove(self, identifier):
+        """Removes the player from the index."""
+        node = self.nodes.pop(identifier)
+        self._unlink(node.key)
+
+    def score(self, identifier):
+        """Returns the player's score, or None if they are not ranked."""
+        node = self.nodes.get(identifier)
+        return node.score if node is not None else None
+
+    def rank(self, identifier):
+        """Returns the competition rank of the player, or None."""
+        node = self.nodes.get(identifier)
+        if node is None:
+            return None
+        return self._count_before((-node.score, -1)) + 1
+
+    def position(self, identifier):
+        """Returns the zero-based position of the player in the listing, or None."""
+        node = self.nodes.get(identifier)
+        if node is None:
+            return None
+        return self._count_before(node.key)
+
+    def slice(self, offset, limit):
+        """Returns up to `limit` (identifier, score) pairs starting at `offset`."""
+        if offset < 0:
+            offset = 0
+        if limit <= 0 or offset >= self.size:
+            return []
+        node = self.head
+        remaining = offset + 1
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        entries = []
+        while node is not self.tail and len(entries) < limit:
+            entries.append((node.identifier, node.score))
+            node = node.next[0]
+        return entries
+
+    def top(self, count):
+        """Returns the `count` highest (identifier, score) pairs."""
+        return self.slice(0, count)
+
+    def around(self, identifier, radius):
+        """Returns the entries within `radius` positions of the player."""
+        position = self.position(identifier)
+        if position is None:
+            return []
+        start = max(0, position - radius)
+        return self.slice(start, position + radius + 1 - start)
+
+    def _count_before(self, key):
+        node = self.head
+        steps = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level].key < key:
+                steps += node.width[level]
+                node = node.next[level]
+        return steps
+
+    def _link(self, key, identifier, score):
+        chain = [None] * self.MAX_LEVEL
+        steps_at_level = [0] * self.MAX_LEVEL
+        node = self.head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level].key < key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+        depth = 1
+        while depth < self.MAX_LEVEL and random.random() < 0.5:
+            depth += 1
+        new_node = _SkipNode(key, identifier, score, depth)
+        steps = 0
+        for level in range(depth):
+            previous = chain[level]
+            new_node.next[level] = previous.next[level]
+            previous.next[level] = new_node
+            new_node.width[level] = previous.width[level] - steps
+            previous.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(depth, self.MAX_LEVEL):
+            chain[level].width[level] += 1
+        self.size += 1
+        return new_node
+
+    def _unlink(self, key):
+        chain = [None] * self.MAX_LEVEL
+        node = self.head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.next[level].key < key:
+                node = node.next[level]
+            chain[level] = node
+        target = chain[0].next[0]
+        depth = len(target.next)
+        for level in range(depth):
+            previous = chain[level]
+            previous.width[level] += target.width[level] - 1
+            previous.next[level] = target.next[level]
+        for level in range(depth, self.MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self.size -= 1
 
 class Leaderboard:
-    def __init__(self, leaderboard_file="leaderboard.json"):
+    def __init__(self, leaderboard_file="leaderboard.json", journal=False, compact_threshold=10000, fsync=True, storage=None,
+                 write_behind=False, flush_interval=1.0, flush_size=500, cache_size=64):
         self.leaderboard_file = leaderboard_file
+        self.storage = storage
+        # The journal only applies to the JSON file; storage backends persist each update themselves.
+        # It assumes a single writing process; snapshot saves merge with other processes.
+        self.journal = journal and storage is None
+        self.journal_file = leaderboard_file + ".log"
+        self.compacting_file = leaderboard_file + ".log.1"
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        # Guards the scores and ranked indexes, which are read and updated from several threads.
+        self._lock = threading.RLock()
+        # Serializes snapshot writes with other processes that share the JSON file.
+        self._file_lock = FileLock(leaderboard_file) if storage is None else contextlib.nullcontext()
+        self._compact_lock = threading.Lock()
+        self._compactor = None
+        self._journal_records = 0
+        self._signature = None
+        # Entries this process changed since it last read or wrote the JSON file. Only
+        # tracked when save_leaderboard rewrites the file, since only it merges.
+        self._track_changes = storage is None and not self.journal
+        self._changed = set()
         self.data = self.load_leaderboard()
+        # Ranked indexes are built per category on first use.
+        self.indexes = {}
+        # Bumped on every update so views can tell when a category changed.
+        self.versions = {}
+        # Full and top-N listings memoized per category as {category: (version, {key: entries})}.
+        # An entry is only used while the category's version is unchanged; the least
+        # recently used categories are evicted beyond `cache_size`.
+        self.cache_size = cache_size
+        self._cache = collections.OrderedDict()
+        self.cache_stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+        if self.journal:
+            self._open_journal()
+        # In write-behind mode updates are coalesced per (category, identifier) and
+        # persisted by a background thread every `flush_interval` seconds or as
+        # soon as `flush_size` distinct entries are pending.
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.flush_metrics = {
+            "updates": 0,
+            "flushes": 0,
+            "records_written": 0,
+            "last_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "total_flush_seconds": 0.0,
+        }
+        self._pending = {}
+        self._flush_lock = threading.Lock()
+        self._flush_wakeup = threading.Condition(self._lock)
+        self._closed = False
+        self._flusher = None
+        if self.write_behind:
+            self._flusher = threading.Thread(target=self._run_flusher, daemon=True)
+            self._flusher.start()
+            atexit.register(self.close)
     
     def load_leaderboard(self):
         """Loads leaderboard data from the JSON file.
         
         Returns a separate dictionary for each category.
         """
+        return self.storage.load_scores() if self.storage is not None else self._read_scores()
+    
+    def save_leaderboard(self):
+        """Saves the leaderboard data to the JSON file.
+        
+        If another process saved the file since this one last read or wrote
+        it, those scores are merged in first. They replace the local ones,
+        except for entries this process changed in the meantime, whose local
+        score is kept even if it is lower. The file is replaced atomically.
+        """
+        with self._file_lock:
+            saved = self._read_scores() if file_signature(self.leaderboard_file) != self._signature else {}
+            with self._lock:
+                self._merge_scores(saved)
+                snapshot = self._snapshot()
+                self._changed.clear()
+            atomic_write_json(self.leaderboard_file, snapshot, indent=4, ensure_ascii=False)
+            self._signature = file_signature(self.leaderboard_file)
+
+    def _read_scores(self):
+        self._signature = file_signature(self.leaderboard_file)
         try:
             with open(self.leaderboard_file, "r", encoding="utf-8") as file:
                 return json.load(file)
         except FileNotFoundError:
             return {}
-    
-    def save_leaderboard(self):
-        """Saves the leaderboard data to the JSON file."""
-        with open(self.leaderboard_file, "w", encoding="utf-8") as file:
-            json.dump(self.data, file, indent=4, ensure_ascii=False)
+
+    def _merge_scores(self, saved):
+        """Takes over saved scores for entries not changed locally since the last sync. Must be called with the lock held."""
+        for category, scores in saved.items():
+            local = self.data.get(category)
+            if local is None:
+                local = self.data[category] = {}
+            changed = False
+            for identifier, score in scores.items():
+                if local.get(identifier) == score or (category, identifier) in self._changed:
+                    continue
+                local[identifier] = score
+                if category in self.indexes:
+                    self.indexes[category].set(identifier, score)
+                changed = True
+            if changed:
+                self.versions[category] = self.versions.get(category, 0) + 1
     
     def update_leaderboard(self, category, identifier, score):
         """Updates the leaderboard for the given category."""
-        if category not in self.data:
-            self.data[category] = {}
-        self.data[category][identifier] = score
-        self.save_leaderboard()
+        with self._lock:
+            scores = self.data.get(category)
+            if scores is None:
+                scores = self.data[category] = {}
+            if scores.get(identifier) != score:
+                scores[identifier] = score
+                if category in self.indexes:
+                    self.indexes[category].set(identifier, score)
+                # Only real changes invalidate cached listings and refresh views.
+                self.versions[category] = self.versions.get(category, 0) + 1
+            # An unchanged score is still persisted: it is this process's latest word on the entry.
+            if self._track_changes:
+                self._changed.add((category, identifier))
+            if self.write_behind:
+                self._pending[(category, identifier)] = score
+                self.flush_metrics["updates"] += 1
+                if len(self._pending) >= self.flush_size:
+                    self._flush_wakeup.notify()
+                return
+            if self.journal:
+                self._append_journal([(category, identifier, score)])
+        if self.storage is not None:
+            self.storage.set_score(category, identifier, score)
+        elif not self.journal:
+            self.save_leaderboard()
+
+    def compact(self):
+        """Folds the journal into the snapshot file.
+        
+        The current journal is rotated aside, a snapshot of the in-memory data
+        is written with an atomic rename and the rotated journal is removed.
+        Updates keep going to a fresh journal while the snapshot is written.
+        """
+        with self._compact_lock:
+            with self._lock:
+                self._journal_handle.close()
+                os.replace(self.journal_file, self.compacting_file)
+                self._journal_handle = open(self.journal_file, "a", encoding="utf-8")
+                self._journal_records = 0
+                snapshot = self._snapshot()
+            atomic_write_json(self.leaderboard_file, snapshot, indent=4, ensure_ascii=False)
+            os.remove(self.compacting_file)
+            fsync_directory(os.path.dirname(os.path.abspath(self.leaderboard_file)))
+
+    def flush(self):
+        """Persists the updates pending in write-behind mode."""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            started = time.perf_counter()
+            records = [(category, identifier, score) for (category, identifier), score in pending.items()]
+            if self.storage is not None:
+                self.storage.set_scores(records)
+            elif self.journal:
+                with self._lock:
+                    self._append_journal(records)
+            else:
+                self.save_leaderboard()
+            elapsed = time.perf_counter() - started
+            with self._lock:
+                metrics = self.flush_metrics
+                metrics["flushes"] += 1
+                metrics["records_written"] += len(records)
+                metrics["last_flush_seconds"] = elapsed
+                metrics["max_flush_seconds"] = max(metrics["max_flush_seconds"], elapsed)
+                metrics["total_flush_seconds"] += elapsed
+
+    def get_flush_metrics(self):
+        """Returns the write-behind counters, including how many writes coalescing saved."""
+        with self._lock:
+            metrics = dict(self.flush_metrics)
+            metrics["pending"] = len(self._pending)
+        # Updates still pending are not counted as saved until their flush has happened.
+        metrics["writes_saved"] = metrics["updates"] - metrics["records_written"] - metrics["pending"]
+        return metrics
+
+    def close(self):
+        """Flushes pending updates, waits for a running compaction and closes the journal."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush_wakeup.notify()
+        if self._flusher is not None:
+            self._flusher.join()
+        if not self.journal:
+            return
+        if self._compactor is not None:
+            self._compactor.join()
+        with self._lock:
+            if not self._journal_handle.closed:
+                self._journal_handle.close()
+
+    def _run_flusher(self):
+        """Background loop of write-behind mode; flushes one last time on close."""
+        while True:
+            with self._lock:
+                if not self._closed and len(self._pending) < self.flush_size:
+                    self._flush_wakeup.wait(self.flush_interval)
+                closed = self._closed
+            self.flush()
+            if closed:
+                return
+
+    def _snapshot(self):
+        """Copies the scores so they can be written after the lock is released. Must be called with the lock held."""
+        return {category: dict(scores) for category, scores in self.data.items()}
+
+    def _open_journal(self):
+        """Replays the journal on top of the snapshot and opens it for appending."""
+        recovering = os.path.exists(self.compacting_file)
+        if recovering:
+            self._replay_journal(self.compacting_file)
+        self._journal_records = self._replay_journal(self.journal_file)
+        if recovering:
+            # A compaction was interrupted: persist everything before dropping the logs.
+            atomic_write_json(self.leaderboard_file, self._snapshot(), indent=4, ensure_ascii=False)
+            os.remove(self.compacting_file)
+            open(self.journal_file, "w", encoding="utf-8").close()
+            fsync_directory(os.path.dirname(os.path.abspath(self.leaderboard_file)))
+            self._journal_records = 0
+        self._journal_handle = open(self.journal_file, "a", encoding="utf-8")
+
+    def _replay_journal(self, path):
+        """Applies the records of a journal file and returns how many were read.
+        
+        A torn record left by a crash is cut off so that new appends start on
+        a clean line.
+        """
+        count = 0
+        valid_size = 0
+        try:
+            with open(path, "rb") as file:
+                for line in file:
+                    try:
+                        category, identifier, score = json.loads(line)
+                    except ValueError:
+                        # A torn record can only be the last one written before a crash.
+                        break
+                    if not line.endswith(b"\n"):
+                        break
+                    if category not in self.data:
+                        self.data[category] = {}
+                    self.data[category][identifier] = score
+                    count += 1
+                    valid_size += len(line)
+        except FileNotFoundError:
+            return 0
+        if os.path.getsize(path) != valid_size:
+            os.truncate(path, valid_size)
+        return count
+
+    def _append_journal(self, records):
+        """Appends score records to the journal. Must be called with the lock held."""
+        lines = "".join(
+            json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n" for record in records
+        )
+        self._journal_handle.write(lines)
+        self._journal_handle.flush()
+        if self.fsync:
+            os.fsync(self._journal_handle.fileno())
+        self._journal_records += len(records)
+        if self._journal_records >= self.compact_threshold and not (self._compactor and self._compactor.is_alive()):
+            self._compactor = threading.Thread(target=self.compact, daemon=True)
+            self._compactor.start()
+
+    def get_index(self, category):
+        """Returns the ranked index for the category, building it if needed."""
+        with self._lock:
+            index = self.indexes.get(category)
+            if index is None:
+                index = self.indexes[category] = RankedIndex(self.data.get(category, {}))
+            return index
 
     def get_rank(self, category, identifier):
-        """Returns the user's rank in the specified category."""
-        if category not in self.data:
-            return None
-        sorted_scores = sorted(self.data[category].items(), key=lambda x: x[1], reverse=True)
-        rank = next((i for i, (user, s) in enumerate(sorted_scores, start=1) if user == identifier), None)
-        return rank
+        """Returns the user's rank in the specified category.
+        
+        Tied scores share the same rank.
+        """
+        with self._lock:
+            if category not in self.data:
+                return None
+            return self.get_index(category).rank(identifier)
 
     def get_full_leaderboard(self, category):
         """Returns the leaderboard information for the specified category."""
-        if category not in self.data:
-            return []
-        return sorted(self.data[category].items(), key=lambda x: x[1], reverse=True)
+        with self._lock:
+            if category not in self.data:
+                return []
+            return list(self._cached(category, "full", lambda index: index.slice(0, len(index))))
+
+    def get_top(self, category, count=10):
+        """Returns the highest `count` (identifier, score) pairs of the category."""
+        with self._lock:
+            if category not in self.data:
+                return []
+            return list(self._cached(category, ("top", count), lambda index: index.top(count)))
+
+    def get_cache_stats(self):
+        """Returns the hit, miss, invalidation and eviction counters of the listing cache."""
+        with self._lock:
+            stats = dict(self.cache_stats)
+            stats["categories"] = len(self._cache)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _cached(self, category, key, compute):
+        """Returns the memoized listing `key` of the category, computing it from the index on a miss.
+        
+        Must be called with the lock held.
+        """
+        version = self.versions.get(category, 0)
+        cached = self._cache.get(category)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(category)
+            entries = cached[1].get(key)
+            if entries is None and key != "full" and "full" in cached[1]:
+                # A top-N listing is a prefix of the full one.
+                entries = cached[1][key] = cached[1]["full"][:key[1]]
+            if entries is not None:
+                self.cache_stats["hits"] += 1
+                return entries
+        else:
+            if cached is not None:
+                self.cache_stats["invalidations"] += 1
+            cached = self._cache[category] = (version, {})
+            self._cache.move_to_end(category)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+                self.cache_stats["evictions"] += 1
+        self.cache_stats["misses"] += 1
+        entries = cached[1][key] = tuple(compute(self.get_index(category)))
+        return entries
+
+    def get_page(self, category, offset, limit):
+        """Returns up to `limit` (rank, identifier, score) rows starting at position `offset`."""
+        with self._lock:
+            if category not in self.data:
+                return []
+            index = self.get_index(category)
+            entries = index.slice(offset, limit)
+            if not entries:
+                return []
+            rows = []
+            rank = index.rank(entries[0][0])
+            previous_score = entries[0][1]
+            for position, (identifier, score) in enumerate(entries, start=max(offset, 0)):
+                if score != previous_score:
+                    # Everyone listed before a new, lower score has a higher score.
+                    rank = position + 1
+                    previous_score = score
+                rows.append((rank, identifier, score))
+            return rows
+
+    def get_position(self, category, identifier):
+        """Returns the zero-based position of the user in the listing, or None."""
+        with self._lock:
+            if category not in self.data:
+                return None
+            return self.get_index(category).position(identifier)
+
+    def get_size(self, category):
+        """Returns the number of players on the category's leaderboard."""
+        with self._lock:
+            return len(self.data.get(category, {}))
+
+    def get_version(self, category):
+        """Returns a counter that changes whenever the category's scores change."""
+        with self._lock:
+            return self.versions.get(category, 0)
+
+    def get_around(self, category, identifier, radius=2):
+        """Returns the players ranked within `radius` places of the user."""
+        with self._lock:
+            if category not in self.data:
+                return []
+            return self.get_index(category).around(identifier, radius)
+
+class WeightTree:
+    """Fenwick tree over non-negative weights.
+
+    Setting a weight, appending one and drawing an index with probability
+    proportional to its weight each take O(log n) time.
+    """
+    __slots__ = ("weights", "tree", "top_bit")
+
+    def __init__(self, weights=()):
+        self.weights = array.array("d", weights)
+        self.tree = array.array("d", [0.0])
+        self.tree.extend(self.weights)
+        size = len(self.weights)
+        for position in range(1, size + 1):
+            parent = position + (position & -position)
+            if parent <= size:
+                self.tree[parent] += self.tree[position]
+        self.top_bit = 1 << size.bit_length() >> 1
+
+    def __len__(self):
+        return len(self.weights)
+
+    def prefix(self, count):
+        """Returns the sum of the first `count` weights."""
+        total = 0.0
+        while count > 0:
+            total += self.tree[count]
+            count &= count - 1
+        return total
+
+    def total(self):
+        return self.prefix(len(self.weights))
+
+    def set(self, index, weight):
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        position = index + 1
+        while position < len(self.tree):
+            self.tree[position] += delta
+            position += position & -position
+
+    def append(self, weight):
+        position = len(self.tree)
+        self.tree.append(weight + self.prefix(position - 1) - self.prefix(position - (position & -position)))
+        self.weights.append(weight)
+        self.top_bit = 1 << position.bit_length() >> 1
+
+    def find(self, target):
+        """Returns the index whose weight interval contains `target`, where 0 <= target < total()."""
+        position = 0
+        bit = self.top_bit
+        while bit:
+            following = position + bit
+            if following < len(self.tree) and self.tree[following] <= target:
+                position = following
+                target -= self.tree[following]
+            bit >>= 1
+        return position
+
+class QuestionStats:
+    """Answer counters and selection weights of one category's questions, by question index."""
+    __slots__ = ("attempts", "correct", "weights")
+
+    def __init__(self, attempts=(), correct=()):
+        self.attempts = array.array("I", attempts)
+        self.correct = array.array("I", correct)
+        self.weights = WeightTree(map(QuestionSelector.weight, self.attempts, self.correct))
+
+    def __len__(self):
+        return len(self.attempts)
+
+    def grow(self, count):
+        """Adds fresh counters for questions appended to the category since the last call."""
+        missing = count - len(self.attempts)
+        if missing <= 0:
+            return
+        self.attempts.extend([0] * missing)
+        self.correct.extend([0] * missing)
+        fresh = QuestionSelector.weight(0, 0)
+        if missing > len(self.weights):
+            # Cheaper to rebuild the tree in one pass than to append one by one.
+            self.weights = WeightTree(self.weights.weights + array.array("d", [fresh] * missing))
+        else:
+            for _ in range(missing):
+                self.weights.append(fresh)
+
+    def difficulty(self, index):
+        """Returns the estimated chance that the question is answered wrongly."""
+        return (self.attempts[index] - self.correct[index] + 1) / (self.attempts[index] + 2)
+
+class QuestionSelector:
+    """Picks questions by weighted sampling on their answer statistics.
+
+    Every question has an attempt and a correct-answer counter, and a weight
+    derived from them that is kept up to date in a Fenwick tree, so recording
+    an outcome and drawing a question both take O(log n) time regardless of
+    the size of the category. Questions that are answered wrongly more often
+    are drawn more often; unseen ones start in the middle.
+
+    In memory the counters are kept by question index, which names the same
+    question for the life of the process because questions are only ever
+    appended to a category. Processes that merge each other's questions may
+    order them differently, so the `stats_file` keys them by question_digest
+    instead. It is read on start, and `save` adds this process's outcomes to
+    it, so several processes can share it.
+    """
+    # Keeps well-known questions in rotation.
+    MIN_WEIGHT = 0.05
+    # Drawing from the shared weights is retried this often before a session builds its own copy.
+    MAX_REJECTIONS = 32
+    # Bytes per question_digest.
+    DIGEST_SIZE = 16
+
+    def __init__(self, stats_file=None, random_source=None):
+        self.stats_file = stats_file
+        self.random = random_source or random.Random()
+        self._lock = threading.Lock()
+        self._file_lock = FileLock(stats_file) if stats_file is not None else contextlib.nullcontext()
+        self.categories = {}
+        # Concatenated question digests by index, kept only with a stats file: {category: bytearray}.
+        self._digests = {}
+        # Counters read from the file: {category: {digest hex: [attempts, correct]}}.
+        self._saved = self._read_stats()
+        # Outcomes recorded since the last save: {category: {digest hex: [attempts, correct]}}.
+        self._unsaved = {}
+
+    @staticmethod
+    def weight(attempts, correct):
+        return QuestionSelector.MIN_WEIGHT + (attempts - correct + 1) / (attempts + 2)
+
+    def stats(self, category_name, questions):
+        """Returns the statistics of the category, covering at least the given questions.
+        
+        Only the length of `questions` is used unless there is a stats file,
+        in which case the counters of new questions are looked up there.
+        """
+        with self._lock:
+            stats = self.categories.get(category_name)
+            if stats is None:
+                stats = self.categories[category_name] = QuestionStats()
+            start = len(stats)
+            stats.grow(len(questions))
+            if self.stats_file is not None and len(stats) > start:
+                saved = self._saved.get(category_name, {})
+                digests = self._digests.setdefault(category_name, bytearray())
+                for index in range(start, len(stats)):
+                    digest = question_digest(questions[index].question)
+                    digests += digest
+                    counters = saved.get(digest.hex())
+                    if counters is not None:
+                        stats.attempts[index], stats.correct[index] = counters
+                        stats.weights.set(index, self.weight(*counters))
+            return stats
+
+    def sampler(self, category_name, questions):
+        """Returns a QuestionSampler that draws each of the given questions of the category once."""
+        return QuestionSampler(self, self.stats(category_name, questions), len(questions))
+
+    def record(self, category_name, index, correct):
+        """Counts an answer to the question and updates its weight."""
+        with self._lock:
+            stats = self.categories.get(category_name)
+            if stats is None or index >= len(stats):
+                return
+            stats.attempts[index] += 1
+            stats.correct[index] += correct
+            stats.weights.set(index, self.weight(stats.attempts[index], stats.correct[index]))
+            if self.stats_file is None:
+                return
+            offset = index * self.DIGEST_SIZE
+            digest = self._digests[category_name][offset:offset + self.DIGEST_SIZE].hex()
+            unsaved = self._unsaved.setdefault(category_name, {}).setdefault(digest, [0, 0])
+            unsaved[0] += 1
+            unsaved[1] += correct
+
+    def draw(self, stats):
+        """Draws an index from the shared weights of the category."""
+        with self._lock:
+            return stats.weights.find(self.random.random() * stats.weights.total())
+
+    def copy_weights(self, stats, count, excluded):
+        """Returns a private WeightTree of the first `count` weights with `excluded` indexes set to zero."""
+        with self._lock:
+            weights = stats.weights.weights[:count]
+        for index in excluded:
+            weights[index] = 0.0
+        return WeightTree(weights)
+
+    def save(self):
+        """Adds the outcomes recorded since the last save to the statistics file."""
+        if self.stats_file is None:
+            return
+        with self._file_lock:
+            saved = self._read_stats()
+            with self._lock:
+                unsaved, self._unsaved = self._unsaved, {}
+            for category_name, outcomes in unsaved.items():
+                counters = saved.setdefault(category_name, {})
+                for digest, (attempts, correct) in outcomes.items():
+                    total = counters.setdefault(digest, [0, 0])
+                    total[0] += attempts
+                    total[1] += correct
+            atomic_write_json(self.stats_file, saved, ensure_ascii=False)
+
+    def _read_stats(self):
+        if self.stats_file is None:
+            return {}
+        try:
+            with open(self.stats_file, "r", encoding="utf-8") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+class QuestionSampler:
+    """Draws one session's questions from a QuestionSelector, each at most once.
+
+    Draws come from the weights shared by all sessions and are retried when
+    they hit a question the session already had. Once a session has used up
+    enough of the category for retries to keep failing, it continues on a
+    private copy of the weights in which asked questions have weight zero.
+    """
+    def __init__(self, selector, stats, count):
+        self.selector = selector
+        self.stats = stats
+        self.count = count
+        self.asked = set()
+        self.weights = None
+
+    def draw(self):
+        """Returns the index of the next question, or None once all were drawn."""
+        if len(self.asked) >= self.count:
+            return None
+        if self.weights is None:
+            for _ in range(self.selector.MAX_REJECTIONS):
+                index = self.selector.draw(self.stats)
+                if index < self.count and index not in self.asked:
+                    self.asked.add(index)
+                    return index
+            self.weights = self.selector.copy_weights(self.stats, self.count, self.asked)
+        index = self.weights.find(self.selector.random.random() * self.weights.total())
+        if index >= self.count or index in self.asked:
+            # Rounding in the running sums; rebuild them exactly once and draw again.
+            self.weights = WeightTree(self.weights.weights)
+            index = self.weights.find(self.selector.random.random() * self.weights.total())
+            if index >= self.count or index in self.asked:
+                index = next(index for index in range(self.count) if index not in self.asked)
+        self.weights.set(index, 0.0)
+        self.asked.add(index)
+        return index
+
+class QuizSession:
+    """One player's run through the questions of a category.
+    
+    The category is resolved once when the session starts; afterwards the
+    session walks its question list with a cursor, or, with a
+    QuestionSampler, in the order the sampler draws. Questions added to the
+    category while the session runs are left for later sessions.
+    """
+    POINTS_PER_CORRECT_ANSWER = 10
+
+    def __init__(self, identifier, category_name, questions, sampler=None):
+        self.identifier = identifier
+        self.category_name = category_name
+        self.questions = questions
+        self.sampler = sampler
+        self.total = len(questions)
+        # Held by QuizEngine while it answers for the session.
+        self.lock = threading.Lock()
+        self.position = 0
+        self.score = 0
+        self.index = self._next_index()
+
+    @classmethod
+    def start(cls, quiz_category, identifier, category_name, selector=None):
+        """Creates a session for the category, or returns None if it does not exist."""
+        questions = quiz_category.get_questions(category_name)
+        if questions is None:
+            return None
+        sampler = selector.sampler(category_name, questions) if selector is not None else None
+        return cls(identifier, category_name, questions, sampler)
+
+    @property
+    def finished(self):
+        return self.position >= self.total
+
+    def current_question(self):
+        """Returns the question under the cursor, or None once all were asked."""
+        if self.finished:
+            return None
+        return self.questions[self.index]
+
+    def answer(self, selected_option):
+        """Checks the option against the current question and moves to the next one."""
+        question = self.questions[self.index]
+        correct = selected_option == question.correct_answer
+        if correct:
+            self.score += self.POINTS_PER_CORRECT_ANSWER
+        self.skip()
+        return correct
+
+    def skip(self):
+        """Moves to the next question without answering."""
+        self.position += 1
+        self.index = self._next_index()
+
+    def _next_index(self):
+        if self.finished or self.sampler is None:
+            return self.position
+        return self.sampler.draw()
+
+class QuizEngine:
+    """UI-independent quiz engine that serves many sessions in one process.
+    
+    Sessions are keyed by ID and every call returns immediately, so the Tk
+    interface, the command-line workflow or a server can drive any number of
+    players at once. The leaderboard is updated after every answer. With a
+    QuestionSelector, sessions draw their questions adaptively and every
+    answer is counted in the selector's statistics.
+    """
+    def __init__(self, user_manager, quiz_category, leaderboard, selector=None):
+        self.user_manager = user_manager
+        self.quiz_category = quiz_category
+        self.leaderboard = leaderboard
+        self.selector = selector
+        self.sessions = {}
+        self._lock = threading.RLock()
+
+    def login(self, identifier, password):
+        """Checks the credentials of a player."""
+        return self.user_manager.login(identifier, password)
+
+    def login_async(self, identifier, password, candidates=None):
+        """Checks the credentials of a player on the worker pool; returns a Future."""
+        return self.user_manager.login_async(identifier, password, candidates)
+
+    def register_async(self, email, username, password):
+        """Registers a player with the password hashed on the worker pool; returns a Future."""
+        return self.user_manager.register_async(email, username, password)
+
+    def start_session(self, identifier, category_name):
+        """Starts a quiz for the player and returns the session ID, or None if the category does not exist."""
+        session = QuizSession.start(self.quiz_category, identifier, category_name, self.selector)
+        if session is None:
+            return None
+        session_id = secrets.token_urlsafe(12)
+        with self._lock:
+            self.sessions[session_id] = session
+        self.leaderboard.update_leaderboard(category_name, identifier, session.score)
+        return session_id
+
+    def current_question(self, session_id):
+        """Returns the question the session is waiting on, or None."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        return session.current_question()
+
+    def answer(self, session_id, selected_option):
+        """Answers the current question of the session.
+        
+        Returns a dictionary with the outcome, the new score and rank, or None
+        if the session does not exist or has no question left.
+        """
+        with self._lock:
+            session = self.sessions.get(session_id)
+        if session is None:
+            return None
+        # The engine lock only guards the session table. The session's own lock keeps
+        # its answers and their leaderboard updates in order without blocking other sessions.
+        with session.lock:
+            if session.finished:
+                return None
+            question = session.current_question()
+            index = session.index
+            correct = session.answer(selected_option)
+            if self.selector is not None:
+                self.selector.record(session.category_name, index, correct)
+            self.leaderboard.update_leaderboard(session.category_name, session.identifier, session.score)
+            rank = self.leaderboard.get_rank(session.category_name, session.identifier)
+            return {
+                "correct": correct,
+                "correct_answer": question.correct_answer,
+                "score": session.score,
+                "rank": rank,
+                "finished": session.finished,
+            }
+
+    def skip(self, session_id):
+        """Moves the session to its next question without answering."""
+        session = self.sessions.get(session_id)
+        if session is None:
+            return
+        with session.lock:
+            if not session.finished:
+                session.skip()
+
+    def status(self, session_id):
+        """Returns the score, rank and progress of the session, or None."""
+        with self._lock:
+            session = self.sessions.get(session_id)
+        return self._summary(session) if session is not None else None
+
+    def end_session(self, session_id):
+        """Removes the session and returns its final status, or None."""
+        with self._lock:
+            session = self.sessions.pop(session_id, None)
+        return self._summary(session) if session is not None else None
+
+    def _summary(self, session):
+        with session.lock:
+            return {
+                "identifier": session.identifier,
+                "category": session.category_name,
+                "score": session.score,
+                "rank": self.leaderboard.get_rank(session.category_name, session.identifier),
+                "position": session.position,
+                "total": session.total,
+            }
 
 class QuizWorkflow:
-    def __init__(self, user_manager, quiz_category, leaderboard):
+    def __init__(self, user_manager, quiz_category, leaderboard, engine=None, input_func=input, output_func=print):
         self.user_manager = user_manager
         self.quiz_category = quiz_category
         self.leaderboard = leaderboard
+        self.engine = engine or QuizEngine(user_manager, quiz_category, leaderboard)
+        # Replaceable so the workflow can run headless with scripted answers.
+        self.input = input_func
+        self.output = output_func
         self.scores = {}
         self.status = {}
 
     def start_quiz(self):
         """Starts the quiz process."""
-        print("Welcome to the quiz!")
+        self.output("Welcome to the quiz!")
         
         # Get login credentials from the user
-        identifier = input("Email or username: ")
-        password = input("Password: ")
+        identifier = self.input("Email or username: ")
+        password = self.input("Password: ")
         
-        if not self.user_manager.login(identifier, password):
+        if not self.engine.login(identifier, password):
             return
         
         # Reset user's score and set status to "In Progress"
@@ -163,74 +1772,227 @@ class QuizWorkflow:
         self.status[identifier] = "In Progress"
         
         # Show categories
-        print("Categories:")
-        for i, category in enumerate(self.quiz_category.categories):
-            print(f"{i + 1}. {category['name']}")
+        self.output("Categories:")
+        category_names = self.quiz_category.category_names()
+        for i, name in enumerate(category_names):
+            self.output(f"{i + 1}. {name}")
         
         # Ask the user to select a category
         try:
-            category_choice = int(input("Select a category (by number): ")) - 1
-            if category_choice < 0 or category_choice >= len(self.quiz_category.categories):
+            category_choice = int(self.input("Select a category (by number): ")) - 1
+            if category_choice < 0 or category_choice >= len(category_names):
                 raise ValueError("Invalid category selection.")
         except ValueError:
-            print("Invalid category selection.")
+            self.output("Invalid category selection.")
             self.status[identifier] = "QUIT"
             return
         
-        selected_category = self.quiz_category.categories[category_choice]
+        selected_category = category_names[category_choice]
+        session_id = self.engine.start_session(identifier, selected_category)
         
         # Display questions and check answers
-        for question in selected_category["questions"]:
-            print(question["question"])
-            for i, option in enumerate(question["options"]):
-                print(f"{i + 1}. {option}")
+        while True:
+            question = self.engine.current_question(session_id)
+            if question is None:
+                break
+            self.output(question.question)
+            for i, option in enumerate(question.options):
+                self.output(f"{i + 1}. {option}")
             
             try:
-                answer = int(input("Enter your answer (by number, -1 to quit): "))
+                answer = int(self.input("Enter your answer (by number, -1 to quit): "))
                 if answer == -1:
-                    print("Quiz was quit.")
+                    self.output("Quiz was quit.")
                     self.status[identifier] = "QUIT"
+                    self.engine.end_session(session_id)
                     return
                 answer -= 1
             except ValueError:
-                print("Invalid input.")
+                self.output("Invalid input.")
+                self.engine.skip(session_id)
                 continue
             
-            if answer < 0 or answer >= len(question["options"]):
-                print("Invalid choice.")
+            if answer < 0 or answer >= len(question.options):
+                self.output("Invalid choice.")
+                self.engine.skip(session_id)
                 continue
             
-            if question["options"][answer] == question["correct_answer"]:
-                print("Correct answer!")
-                self.scores[identifier] += 10  # Add 10 points for correct answer
+            result = self.engine.answer(session_id, question.options[answer])
+            if result["correct"]:
+                self.output("Correct answer!")
             else:
-                print(f"Wrong answer. Correct answer: {question['correct_answer']}")
+                self.output(f"Wrong answer. Correct answer: {result['correct_answer']}")
+            self.scores[identifier] = result["score"]
             
             # Display the user's current score and rank
-            self.display_user_status(identifier, selected_category["name"])
+            self.display_user_status(identifier, selected_category)
         
-        print(f"Quiz completed! Your total score: {self.scores[identifier]}")
+        # The engine has kept the leaderboard up to date after every answer
+        self.engine.end_session(session_id)
+        self.output(f"Quiz completed! Your total score: {self.scores[identifier]}")
         self.status[identifier] = "Completed"
-        # Update the leaderboard with the category information
-        self.leaderboard.update_leaderboard(selected_category["name"], identifier, self.scores[identifier])
 
     def display_user_status(self, identifier, category):
         """Displays the user's current score and ranking."""
         rank = self.leaderboard.get_rank(category, identifier)
-        print(f"Your current score: {self.scores[identifier]}, Rank: {rank}")
+        self.output(f"Your current score: {self.scores[identifier]}, Rank: {rank}")
+
+class LeaderboardView:
+    """Leaderboard window that renders only the rows currently visible.
+    
+    A fixed set of row labels is reused while paging through the ranked
+    query API of `Leaderboard`, and the visible page is re-fetched only when
+    the category's version changes.
+    """
+    PAGE_SIZE = 15
+    REFRESH_MS = 1000
+
+    def __init__(self, root, leaderboard, category, identifier=None):
+        self.leaderboard = leaderboard
+        self.category = category
+        self.identifier = identifier
+        self.offset = 0
+        self.rendered_version = None
+        self.refresh_job = None
+
+        self.window = tk.Toplevel(root)
+        self.window.title("Global Leaderboard")
+        self.window.geometry("300x520")
+        tk.Label(self.window, text=f"{category} Leaderboard", font=("Arial", 16)).pack(pady=10)
+        self.rows = []
+        for _ in range(self.PAGE_SIZE):
+            row = tk.Label(self.window, font=("Arial", 12), anchor="w")
+            row.pack(fill="x", padx=20)
+            self.rows.append(row)
+        self.default_color = self.rows[0].cget("fg")
+        self.position_label = tk.Label(self.window)
+        self.position_label.pack(pady=5)
+
+        button_frame = tk.Frame(self.window)
+        button_frame.pack(pady=5)
+        tk.Button(button_frame, text="Prev", command=lambda: self.scroll(-self.PAGE_SIZE)).pack(side=tk.LEFT, padx=2)
+        tk.Button(button_frame, text="Next", command=lambda: self.scroll(self.PAGE_SIZE)).pack(side=tk.LEFT, padx=2)
+        if identifier is not None:
+            tk.Button(button_frame, text="My Rank", command=self.jump_to_user).pack(side=tk.LEFT, padx=2)
+        tk.Button(self.window, text="Close", command=self.close).pack(pady=5)
+
+        self.window.bind("<MouseWheel>", lambda event: self.scroll(-1 if event.delta > 0 else 1))
+        self.window.bind("<Button-4>", lambda event: self.scroll(-1))
+        self.window.bind("<Button-5>", lambda event: self.scroll(1))
+        self.window.bind("<Prior>", lambda event: self.scroll(-self.PAGE_SIZE))
+        self.window.bind("<Next>", lambda event: self.scroll(self.PAGE_SIZE))
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.render()
+        self.refresh_job = self.window.after(self.REFRESH_MS, self.refresh)
+
+    def render(self):
+        """Fills the row labels with the page starting at the current offset."""
+        self.rendered_version = self.leaderboard.get_version(self.category)
+        size = self.leaderboard.get_size(self.category)
+        rows = self.leaderboard.get_page(self.category, self.offset, self.PAGE_SIZE)
+        for label, row in itertools.zip_longest(self.rows, rows):
+            if row is None:
+                label.config(text="", fg=self.default_color)
+                continue
+            rank, user, score = row
+            color = "blue" if user == self.identifier else self.default_color
+            label.config(text=f"{rank}. {user} - {score} points", fg=color)
+        if not size:
+            self.rows[0].config(text="No leaderboard data yet.")
+            self.position_label.config(text="")
+        else:
+            self.position_label.config(text=f"{self.offset + 1}-{self.offset + len(rows)} of {size}")
+
+    def scroll(self, rows):
+        """Moves the visible page by the given number of rows."""
+        last_offset = max(0, self.leaderboard.get_size(self.category) - self.PAGE_SIZE)
+        offset = min(max(0, self.offset + rows), last_offset)
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def jump_to_user(self):
+        """Scrolls so that the current user's row is in the middle of the page."""
+        position = self.leaderboard.get_position(self.category, self.identifier)
+        if position is not None:
+            self.scroll(position - self.PAGE_SIZE // 2 - self.offset)
+
+    def refresh(self):
+        """Re-renders the visible page when the category has changed since the last render."""
+        if self.leaderboard.get_version(self.category) != self.rendered_version:
+            self.render()
+        self.refresh_job = self.window.after(self.REFRESH_MS, self.refresh)
+
+    def close(self):
+        if self.refresh_job is not None:
+            self.window.after_cancel(self.refresh_job)
+        self.window.destroy()
+
+class QuestionView:
+    """Question screen whose widgets are built once and reconfigured for every question.
+    
+    Option buttons come from a pool that grows to the largest option count
+    seen; unused buttons are hidden. Answer feedback is shown inline.
+    """
+    def __init__(self, parent, on_answer, on_logout, option_count=4):
+        self.on_answer = on_answer
+        self.options = []
+        self.visible_buttons = 0
+        self.frame = tk.Frame(parent)
+        self.frame.pack(fill="both", expand=True)
+        self.info_label = tk.Label(self.frame, font=("Arial", 12))
+        self.info_label.pack(pady=5)
+        self.question_label = tk.Label(self.frame, wraplength=450, font=("Arial", 14))
+        self.question_label.pack(pady=10)
+        self.options_frame = tk.Frame(self.frame)
+        self.options_frame.pack(fill="x")
+        self.buttons = []
+        self.ensure_buttons(option_count)
+        self.feedback_label = tk.Label(self.frame, wraplength=450, font=("Arial", 11))
+        self.feedback_label.pack(pady=5)
+        # "Logout" button allows the user to exit the quiz and return to the login screen.
+        tk.Button(self.frame, text="Logout", command=on_logout).pack(pady=10)
+
+    def ensure_buttons(self, count):
+        """Grows the button pool to at least `count` buttons."""
+        while len(self.buttons) < count:
+            index = len(self.buttons)
+            self.buttons.append(tk.Button(self.options_frame, command=lambda i=index: self.on_answer(self.options[i])))
+
+    def show(self, question, score, rank, feedback="", correct=None):
+        """Displays the question, the player's status and the feedback on the previous answer."""
+        self.options = question.options
+        self.info_label.config(text=f"Current Score: {score}    Your Rank: {rank}")
+        self.question_label.config(text=question.question)
+        self.ensure_buttons(len(self.options))
+        for button, option in zip(self.buttons, self.options):
+            button.config(text=option)
+        if len(self.options) != self.visible_buttons:
+            for button in self.buttons[:self.visible_buttons]:
+                button.pack_forget()
+            for button in self.buttons[:len(self.options)]:
+                button.pack(pady=2, fill="x", padx=20)
+            self.visible_buttons = len(self.options)
+        color = {True: "green", False: "red"}.get(correct, "black")
+        self.feedback_label.config(text=feedback, fg=color)
 
 class Interface:
-    def __init__(self):
+    def __init__(self, storage=None, lazy=False, pack=False, adaptive=False):
         # Create instances of the classes.
-        self.user_manager = UserManager()
-        self.quiz_category = QuizCategory()
-        self.leaderboard = Leaderboard()
-        # QuizWorkflow instance can be created if needed, but separate functions are used for the interface flow.
-        self.quiz_workflow = QuizWorkflow(self.user_manager, self.quiz_category, self.leaderboard)
+        self.storage = storage
+        self.user_manager = UserManager(storage=storage)
+        self.quiz_category = QuizCategory(storage=storage, lazy=lazy, pack=pack)
+        # Scores are written behind the UI so answering never waits on disk I/O.
+        self.leaderboard = Leaderboard(storage=storage, write_behind=True)
+        # The interface is a thin client of the engine; QuizWorkflow shares it for the command-line flow.
+        self.selector = QuestionSelector("question_stats.json") if adaptive else None
+        self.engine = QuizEngine(self.user_manager, self.quiz_category, self.leaderboard, self.selector)
+        self.quiz_workflow = QuizWorkflow(self.user_manager, self.quiz_category, self.leaderboard, self.engine)
         self.current_user = None
-        self.current_score = 0
         self.current_category = None
-        self.current_question_index = 0
+        self.session_id = None
+        self.question_view = None
 
         # Main tkinter window
         self.root = tk.Tk()
@@ -286,9 +2048,16 @@ class Interface:
     def login_callback(self):
         identifier = self.identifier_entry.get()
         password = self.password_entry.get()
-        if self.user_manager.login(identifier, password):
+        # Password hashing is slow on purpose; poll the result instead of blocking the window.
+        future = self.engine.login_async(identifier, password)
+        self.root.after(20, self.finish_login, identifier, future)
+
+    def finish_login(self, identifier, future):
+        if not future.done():
+            self.root.after(20, self.finish_login, identifier, future)
+            return
+        if future.result():
             self.current_user = identifier
-            self.current_score = 0
             self.show_categories()
         else:
             messagebox.showerror("Error", "Invalid email/username or password!")
@@ -297,11 +2066,19 @@ class Interface:
         email = self.reg_email.get()
         username = self.reg_username.get()
         password = self.reg_password.get()
-        if self.user_manager.register(email, username, password):
+        # Hashing the new password takes as long as checking one at login.
+        future = self.engine.register_async(email, username, password)
+        self.root.after(20, self.finish_registration, future)
+
+    def finish_registration(self, future):
+        if not future.done():
+            self.root.after(20, self.finish_registration, future)
+            return
+        if future.result():
             messagebox.showinfo("Success", "Registration successful! Redirecting to login screen.")
             self.create_login_screen()
         else:
-            messagebox.showerror("Error", "This email is already registered!")
+            messagebox.showerror("Error", "This email or username is already registered!")
     
     def show_categories(self):
         self.clear_frame()
@@ -309,7 +2086,7 @@ class Interface:
         
         # List categories
         self.category_var = tk.StringVar(self.main_frame)
-        categories = [cat["name"] for cat in self.quiz_category.categories]
+        categories = self.quiz_category.category_names()
         if not categories:
             tk.Label(self.main_frame, text="No categories found.").pack()
         else:
@@ -367,7 +2144,7 @@ class Interface:
         # Category selection
         tk.Label(self.main_frame, text="Select Category:").pack()
         self.question_cat_var = tk.StringVar(self.main_frame)
-        categories = [cat["name"] for cat in self.quiz_category.categories]
+        categories = self.quiz_category.category_names()
         if not categories:
             messagebox.showerror("Error", "You must add a category first!")
             self.show_categories()
@@ -408,12 +2185,9 @@ class Interface:
         options = [opt.strip() for opt in self.options_entry.get().split(",")]
         correct_answer = self.correct_answer_entry.get()
         
-        if len(options) < 2:
-            messagebox.showerror("Error", "You must enter at least 2 options!")
-            return
-        
-        if correct_answer not in options:
-            messagebox.showerror("Error", "The correct answer must be one of the options!")
+        error = validate_question(options, correct_answer)
+        if error is not None:
+            messagebox.showerror("Error", error)
             return
         
         if self.quiz_category.add_question(category, question, options, correct_answer):
@@ -424,96 +2198,86 @@ class Interface:
 
     def select_category(self):
         self.current_category = self.category_var.get()
-        self.current_question_index = 0
-        self.current_score = 0
-        self.show_question()
-    
-    def show_question(self):
-        self.clear_frame()
-        # Update leaderboard if the current user is set
-        if self.current_user:
-            self.leaderboard.update_leaderboard(self.current_category, self.current_user, self.current_score)
-        current_rank = self.leaderboard.get_rank(self.current_category, self.current_user) if self.current_user else "-"
-        info_label = tk.Label(self.main_frame, text=f"Current Score: {self.current_score}    Your Rank: {current_rank}", font=("Arial", 12))
-        info_label.pack(pady=5)
-        
-        # Display question
-        category = next((cat for cat in self.quiz_category.categories if cat["name"] == self.current_category), None)
-        if not category:
+        self.session_id = self.engine.start_session(self.current_user, self.current_category)
+        if self.session_id is None:
             messagebox.showerror("Error", "Category not found!")
             return
-        
-        questions = category.get("questions", [])
-        if self.current_question_index >= len(questions):
-            self.quiz_finished()
+        self.clear_frame()
+        self.question_view = QuestionView(self.main_frame, self.check_answer, self.logout_callback)
+        self.show_question()
+    
+    def show_question(self, feedback="", correct=None):
+        status = self.engine.status(self.session_id)
+        current_question = self.engine.current_question(self.session_id)
+        if current_question is None:
+            self.quiz_finished(feedback)
             return
-        
-        current_question = questions[self.current_question_index]
-        tk.Label(self.main_frame, text=current_question["question"], wraplength=450, font=("Arial", 14)).pack(pady=10)
-        
-        for option in current_question["options"]:
-            btn = tk.Button(self.main_frame, text=option, 
-                            command=lambda opt=option: self.check_answer(opt, current_question))
-            btn.pack(pady=2, fill="x", padx=20)
-        
-        # "Logout" button allows the user to exit the quiz and return to the login screen.
-        logout_btn = tk.Button(self.main_frame, text="Logout", command=self.logout_callback)
-        logout_btn.pack(pady=10)
+        self.question_view.show(current_question, status["score"], status["rank"], feedback, correct)
     
-    def check_answer(self, selected_option, question):
-        if selected_option == question["correct_answer"]:
-            self.current_score += 10
-            messagebox.showinfo("Correct", "Correct answer!")
+    def check_answer(self, selected_option):
+        result = self.engine.answer(self.session_id, selected_option)
+        if result["correct"]:
+            feedback = "Correct answer!"
         else:
-            messagebox.showinfo("Incorrect", f"Incorrect answer!\nCorrect answer: {question['correct_answer']}")
-        self.leaderboard.update_leaderboard(self.current_category, self.current_user, self.current_score)
-        current_rank = self.leaderboard.get_rank(self.current_category, self.current_user)
-        messagebox.showinfo("Info", f"Your updated score: {self.current_score}\nYour rank: {current_rank}")
-        self.current_question_index += 1
-        self.show_question()
+            feedback = f"Incorrect answer! Correct answer: {result['correct_answer']}"
+        feedback += f"\nYour updated score: {result['score']}    Your rank: {result['rank']}"
+        self.show_question(feedback, result["correct"])
     
-    def quiz_finished(self):
-        self.leaderboard.update_leaderboard(self.current_category, self.current_user, self.current_score)
-        rank = self.leaderboard.get_rank(self.current_category, self.current_user)
-        messagebox.showinfo("Quiz Finished", f"Quiz completed!\nTotal score: {self.current_score}\nYour rank: {rank}")
+    def quiz_finished(self, feedback=""):
+        summary = self.engine.end_session(self.session_id)
+        self.session_id = None
+        message = f"Quiz completed!\nTotal score: {summary['score']}\nYour rank: {summary['rank']}"
+        if feedback:
+            message = feedback.split("\n")[0] + "\n\n" + message
+        messagebox.showinfo("Quiz Finished", message)
         self.show_leaderboard_screen()
     
     def show_leaderboard_screen(self):
-        leaderboard_window = tk.Toplevel(self.root)
-        leaderboard_window.title("Global Leaderboard")
-        leaderboard_window.geometry("300x400")
-        
-        tk.Label(leaderboard_window, text=f"{self.current_category} Leaderboard", font=("Arial", 16)).pack(pady=10)
-        
-        full_lb = self.leaderboard.get_full_leaderboard(self.current_category)
-        if not full_lb:
-            tk.Label(leaderboard_window, text="No leaderboard data yet.").pack()
-        else:
-            for rank, (user, score) in enumerate(full_lb, start=1):
-                tk.Label(leaderboard_window, text=f"{rank}. {user} - {score} points", font=("Arial", 12)).pack(pady=2)
-        
-        close_btn = tk.Button(leaderboard_window, text="Close", command=leaderboard_window.destroy)
-        close_btn.pack(pady=10)
+        LeaderboardView(self.root, self.leaderboard, self.current_category, self.current_user)
         self.show_categories()
     
     def logout_callback(self):
         """Resets the current user information and returns to the login screen."""
+        if self.session_id is not None:
+            self.engine.end_session(self.session_id)
+        self.leaderboard.flush()
         self.current_user = None
-        self.current_score = 0
         self.current_category = None
-        self.current_question_index = 0
+        self.session_id = None
         self.create_login_screen()
     
     def clear_frame(self):
         for widget in self.main_frame.winfo_children():
             widget.destroy()
+        self.question_view = None
     
     def run(self):
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            self.leaderboard.close()
+            if self.selector is not None:
+                self.selector.save()
+            if self.storage is not None:
+                self.storage.close()
 
 # When the program starts, the interface window will open:
 if __name__ == "__main__":
-    interface = Interface()
-    interface.run()
+    parser = argparse.ArgumentParser(description="Quiz application.")
+    parser.add_argument("--db", help="use the given SQLite database instead of the JSON files")
+    parser.add_argument("--lazy", action="store_true", help="load each category's questions on first use")
+    parser.add_argument("--pack", action="store_true", help="read questions from a compiled binary pack")
+    parser.add_argument("--adaptive", action="store_true", help="ask the questions players get wrong most often more often")
+    parser.add_argument("--metrics", help="periodically write call timings to this file (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--profile", help="write cProfile statistics of the whole session to this file")
+    args = parser.parse_args()
+    import instrumentation
+    with instrumentation.session(sys.modules[__name__], args.metrics, args.profile):
+        storage = None
+        if args.db:
+            from storage import SQLiteStorage
+            storage = SQLiteStorage(args.db)
+        interface = Interface(storage, lazy=args.lazy, pack=args.pack, adaptive=args.adaptive)
+        interface.run()
 
 
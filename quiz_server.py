@@ -0,0 +1,390 @@
+"""asyncio HTTP/WebSocket front end for the quiz engine.
+
+Endpoints (JSON bodies and responses):
+
+    POST   /register                  {"email", "username", "password"}
+    POST   /login                     {"identifier", "password"}
+    GET    /categories
+    POST   /sessions                  {"identifier", "password", "category"}
+    GET    /sessions/<id>
+    POST   /sessions/<id>/answer      {"option"}
+    DELETE /sessions/<id>
+    GET    /leaderboard/<category>[?offset=N&limit=N]
+    GET    /ws?category=<category>    WebSocket; pushes rank updates for the category
+
+Everything that touches the storage or the shared quiz state runs in a thread
+pool, so the event loop never waits on disk I/O. Password hashing and checks
+run on the UserManager's own worker pool.
+"""
+import argparse
+import asyncio
+import base64
+import concurrent.futures
+import functools
+import hashlib
+import json
+import os
+import signal
+import struct
+import sys
+import urllib.parse
+
+import instrumentation
+import quiz
+from quiz import Leaderboard, PasswordHasher, QuestionSelector, QuizCategory, QuizEngine, UserManager
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+def text_field(data, name, default=""):
+    """Returns a string field of a request body; a missing field is `default`, or an error if that is None."""
+    value = data.get(name, default)
+    if not isinstance(value, str):
+        raise HttpError(400, f"{name} must be a string.")
+    return value
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed", 409: "Conflict"}
+
+class QuizServer:
+    # Frames queued for a WebSocket client that is not reading; beyond this it is disconnected.
+    WATCHER_QUEUE_SIZE = 64
+
+    def __init__(self, engine, host="127.0.0.1", port=8080, workers=4):
+        self.engine = engine
+        self.host = host
+        self.port = port
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+        self.watchers = {}
+
+    async def serve(self):
+        """Serves until SIGTERM, or until the task is cancelled by Ctrl+C."""
+        stopped = asyncio.Event()
+        try:
+            # Let `kill` shut the server down like Ctrl+C, so pending scores and metrics are written.
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopped.set)
+        except NotImplementedError:
+            pass
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        print(f"Quiz server listening on http://{self.host}:{self.port}", file=sys.stderr, flush=True)
+        try:
+            await stopped.wait()
+        finally:
+            server.close()
+
+    async def offload(self, function, *args):
+        """Runs a blocking call in the thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except HttpError as error:
+                    # Without a valid length the body cannot be skipped, so the connection is not reused.
+                    self.write_response(writer, error.status, {"error": error.message})
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                if path == "/ws" and headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, query, headers)
+                    break
+                try:
+                    status, payload = 200, await self.dispatch(method, path, query, body)
+                except HttpError as error:
+                    status, payload = error.status, {"error": error.message}
+                self.write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # Idle keep-alive connections are cancelled when serve() returns; nothing is left to answer.
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            return None
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length", 0))
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise HttpError(400, "Invalid Content-Length.")
+        body = await reader.readexactly(length) if length else b""
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        return method.upper(), urllib.parse.unquote(url.path), query, headers, body
+
+    def write_response(self, writer, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, 'Error')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "\r\n".encode("latin-1") + body
+        )
+
+    async def dispatch(self, method, path, query, body):
+        try:
+            data = json.loads(body) if body else {}
+        except ValueError:
+            raise HttpError(400, "Request body must be JSON.")
+        if not isinstance(data, dict):
+            raise HttpError(400, "Request body must be a JSON object.")
+        parts = [part for part in path.split("/") if part]
+
+        if parts == ["register"] and method == "POST":
+            # Hashed on the UserManager's worker pool; UserManager serializes the duplicate check and insert itself.
+            ok = await asyncio.wrap_future(self.engine.register_async(
+                text_field(data, "email"), text_field(data, "username"), text_field(data, "password")
+            ))
+            if not ok:
+                raise HttpError(409, "This email or username is already registered.")
+            return {"registered": True}
+        if parts == ["login"] and method == "POST":
+            if not await self.login(text_field(data, "identifier"), text_field(data, "password")):
+                raise HttpError(401, "Invalid email/username or password.")
+            return {"logged_in": True}
+        if parts == ["categories"] and method == "GET":
+            return {"categories": self.engine.quiz_category.category_names()}
+        if parts == ["sessions"] and method == "POST":
+            identifier = text_field(data, "identifier")
+            if not await self.login(identifier, text_field(data, "password")):
+                raise HttpError(401, "Invalid email/username or password.")
+            session_id = await self.offload(self.engine.start_session, identifier, text_field(data, "category"))
+            if session_id is None:
+                raise HttpError(404, "Category not found.")
+            return await self.offload(self.session_state, session_id)
+        if len(parts) >= 2 and parts[0] == "sessions":
+            session_id = parts[1]
+            if len(parts) == 2 and method == "GET":
+                return await self.offload(self.session_state, session_id)
+            if len(parts) == 2 and method == "DELETE":
+                summary = await self.offload(self.engine.end_session, session_id)
+                if summary is None:
+                    raise HttpError(404, "Session not found.")
+                return summary
+            if parts[2:] == ["answer"] and method == "POST":
+                result, status = await self.offload(self.answer, session_id, text_field(data, "option", None))
+                self.broadcast(status["category"], {
+                    "type": "rank",
+                    "category": status["category"],
+                    "identifier": status["identifier"],
+                    "score": result["score"],
+                    "rank": result["rank"],
+                })
+                return result
+        if parts[:1] == ["leaderboard"] and len(parts) == 2 and method == "GET":
+            if "limit" in query:
+                try:
+                    offset, limit = int(query.get("offset", 0)), int(query["limit"])
+                except ValueError:
+                    raise HttpError(400, "offset and limit must be integers.")
+                rows = await self.offload(self.engine.leaderboard.get_page, parts[1], offset, limit)
+                return {"category": parts[1], "offset": offset, "rows": [list(row) for row in rows]}
+            entries = await self.offload(self.engine.leaderboard.get_full_leaderboard, parts[1])
+            return {"category": parts[1], "leaderboard": [[identifier, score] for identifier, score in entries]}
+        raise HttpError(404, "Not found.")
+
+    async def login(self, identifier, password):
+        """Checks the credentials without blocking the event loop.
+        
+        The user lookup may stat and re-read the users file or query the
+        database, so it runs in the thread pool; the key derivation then runs
+        on the UserManager's worker pool.
+        """
+        candidates = await self.offload(self.engine.user_manager.login_candidates, identifier)
+        return await asyncio.wrap_future(self.engine.login_async(identifier, password, candidates))
+
+    def answer(self, session_id, option):
+        """Answers the session's question and returns the result and the new status."""
+        status = self.engine.status(session_id)
+        if status is None:
+            raise HttpError(404, "Session not found.")
+        result = self.engine.answer(session_id, option)
+        if result is None:
+            raise HttpError(409, "The session has no question left.")
+        result["question"] = self.public_question(self.engine.current_question(session_id))
+        return result, status
+
+    def session_state(self, session_id):
+        state = self.engine.status(session_id)
+        if state is None:
+            raise HttpError(404, "Session not found.")
+        state["session_id"] = session_id
+        state["question"] = self.public_question(self.engine.current_question(session_id))
+        return state
+
+    @staticmethod
+    def public_question(question):
+        """Returns the question without its correct answer."""
+        if question is None:
+            return None
+        return {"question": question.question, "options": list(question.options)}
+
+    async def handle_websocket(self, reader, writer, query, headers):
+        key = headers.get("sec-websocket-key", "")
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode("ascii")).digest()).decode("ascii")
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n"
+            "\r\n".encode("latin-1")
+        )
+        await writer.drain()
+        category = query.get("category", "")
+        # Outgoing frames go through a bounded queue that a task of its own sends,
+        # so a client that reads slowly never holds up the requests that broadcast to it.
+        watchers = self.watchers.setdefault(category, {})
+        queue = watchers[writer] = asyncio.Queue(self.WATCHER_QUEUE_SIZE)
+        sender = asyncio.create_task(self.send_frames(writer, queue))
+        try:
+            while True:
+                opcode, payload = await read_frame(reader)
+                if opcode == 0x8:
+                    writer.write(encode_frame(payload, opcode=0x8))
+                    break
+                if opcode == 0x9:
+                    self.enqueue(watchers, writer, encode_frame(payload, opcode=0xA))
+        finally:
+            watchers.pop(writer, None)
+            sender.cancel()
+
+    async def send_frames(self, writer, queue):
+        """Writes the frames queued for one WebSocket client until it disconnects."""
+        try:
+            while True:
+                writer.write(await queue.get())
+                await writer.drain()
+        except ConnectionError:
+            writer.close()
+
+    def broadcast(self, category, message):
+        """Queues a message for every WebSocket watching the category."""
+        watchers = self.watchers.get(category)
+        if not watchers:
+            return
+        frame = encode_frame(json.dumps(message, ensure_ascii=False).encode("utf-8"))
+        for writer in list(watchers):
+            self.enqueue(watchers, writer, frame)
+
+    @staticmethod
+    def enqueue(watchers, writer, frame):
+        """Queues a frame for the client, disconnecting it if its queue is full."""
+        queue = watchers.get(writer)
+        if queue is None:
+            return
+        if writer.is_closing():
+            watchers.pop(writer, None)
+            return
+        try:
+            queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            watchers.pop(writer, None)
+            writer.close()
+
+def encode_frame(payload, opcode=0x1):
+    """Encodes an unmasked server-to-client WebSocket frame."""
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 1 << 16:
+        header += bytes([126]) + struct.pack("!H", length)
+    else:
+        header += bytes([127]) + struct.pack("!Q", length)
+    return header + payload
+
+async def read_frame(reader):
+    """Reads one client-to-server WebSocket frame and returns (opcode, payload)."""
+    first, second = await reader.readexactly(2)
+    opcode = first & 0x0F
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = bytes(byte ^ mask[i % 4] for i, byte in enumerate(payload))
+    return opcode, payload
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the quiz over HTTP and WebSocket.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--workers", type=int, default=4, help="threads used for storage calls")
+    parser.add_argument("--data-dir", default=".", help="directory holding the JSON data files")
+    parser.add_argument("--db", help="use the given SQLite database instead of the JSON files")
+    parser.add_argument("--pack", action="store_true", help="read questions from a compiled binary pack")
+    parser.add_argument("--adaptive", action="store_true", help="ask the questions players get wrong most often more often")
+    parser.add_argument("--journal", action="store_true", help="journal leaderboard updates instead of rewriting the file")
+    parser.add_argument("--password-scheme", choices=["pbkdf2_sha256", "scrypt"], default="pbkdf2_sha256")
+    parser.add_argument("--password-iterations", type=int, default=600000, help="PBKDF2 iterations")
+    parser.add_argument("--scrypt-n", type=int, default=2 ** 14, help="scrypt CPU/memory cost")
+    parser.add_argument("--hash-processes", type=int, default=0, help="verify passwords in a process pool of this size")
+    parser.add_argument("--write-behind", action="store_true", help="coalesce leaderboard writes in a background thread")
+    parser.add_argument("--quiet", action="store_true", help="suppress the per-request messages printed by the quiz classes")
+    parser.add_argument("--metrics", help="periodically write call timings to this file (.prom for Prometheus text, else JSON)")
+    parser.add_argument("--profile", help="write cProfile statistics of the event loop thread to this file")
+    args = parser.parse_args()
+    with instrumentation.session(quiz, args.metrics, args.profile):
+        run(args)
+
+def run(args):
+    """Builds the quiz objects from the command-line options and serves until interrupted."""
+    storage = None
+    if args.db:
+        from storage import SQLiteStorage
+        storage = SQLiteStorage(args.db)
+    hasher = PasswordHasher(args.password_scheme, iterations=args.password_iterations, scrypt_n=args.scrypt_n)
+    executor = concurrent.futures.ProcessPoolExecutor(args.hash_processes) if args.hash_processes else None
+    user_manager = UserManager(os.path.join(args.data_dir, "users.json"), storage=storage, hasher=hasher, executor=executor)
+    quiz_category = QuizCategory(os.path.join(args.data_dir, "quiz_categories.json"), storage=storage, pack=args.pack)
+    leaderboard = Leaderboard(os.path.join(args.data_dir, "leaderboard.json"), journal=args.journal, storage=storage,
+                              write_behind=args.write_behind)
+    selector = QuestionSelector(os.path.join(args.data_dir, "question_stats.json")) if args.adaptive else None
+    server = QuizServer(QuizEngine(user_manager, quiz_category, leaderboard, selector), args.host, args.port, args.workers)
+    if args.quiet:
+        sys.stdout = open(os.devnull, "w")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.executor.shutdown()
+        leaderboard.close()
+        if selector is not None:
+            selector.save()
+        if storage is not None:
+            storage.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,428 @@
+import argparse
+import contextlib
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows; writes stay atomic but are not serialized between processes.
+    fcntl = None
+
+def fsync_directory(directory):
+    """Flushes a directory entry so that a rename inside it survives a crash."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+@contextlib.contextmanager
+def atomic_open(path, mode="w"):
+    """Opens a temporary file that atomically replaces `path` when the block exits.
+    
+    If the block raises, the temporary file is removed and `path` is left untouched.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path) + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as file:
+            yield file
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+def atomic_write_json(path, data, **dump_options):
+    """Writes JSON to a temporary file and atomically renames it over `path`."""
+    with atomic_open(path) as file:
+        json.dump(data, file, **dump_options)
+
+def file_signature(path):
+    """Returns (inode, size, mtime_ns) of a file, which changes with every atomic rewrite, or None."""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+class FileLock:
+    """Exclusive advisory lock that serializes writers of `path` across processes.
+    
+    The lock is taken on a separate `path + ".lock"` file, because the data
+    file itself is replaced by every atomic write. The lock is reentrant, and
+    threads of one process also exclude each other.
+    """
+    def __init__(self, path):
+        self.lock_file = path + ".lock"
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._handle = None
+
+    def __enter__(self):
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                self._handle = open(self.lock_file, "a")
+                fcntl.flock(self._handle.fileno(), fcntl.LOCK_EX)
+            except BaseException:
+                if self._handle is not None:
+                    self._handle.close()
+                    self._handle = None
+                self._lock.release()
+                raise
+        self._depth += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        self._depth -= 1
+        if self._depth == 0 and self._handle is not None:
+            fcntl.flock(self._handle.fileno(), fcntl.LOCK_UN)
+            self._handle.close()
+            self._handle = None
+        self._lock.release()
+
+class Storage:
+    """Repository interface shared by the storage backends.
+
+    `UserManager`, `QuizCategory` and `Leaderboard` accept an instance through
+    their `storage` argument and then read and persist through it instead of
+    their own JSON files. Mutations describe only the record that changed, so
+    a backend can write it without touching the rest of the data.
+    """
+
+    def find_user_by_email(self, email):
+        """Returns the user with the given email, or None."""
+        raise NotImplementedError
+
+    def find_user_by_username(self, username):
+        """Returns the user with the given username, or None."""
+        raise NotImplementedError
+
+    def load_users(self):
+        """Returns every user as a list of dictionaries."""
+        raise NotImplementedError
+
+    def add_user(self, user):
+        """Stores a new user."""
+        raise NotImplementedError
+
+    def update_user(self, user):
+        """Stores the changed fields of an existing user, matched by email."""
+        raise NotImplementedError
+
+    def load_categories(self):
+        """Returns every category together with its questions."""
+        raise NotImplementedError
+
+    def load_category_names(self):
+        """Returns the category names without their questions."""
+        return [category["name"] for category in self.load_categories()]
+
+    def load_questions(self, category_name):
+        """Returns the questions of a single category."""
+        category = next((category for category in self.load_categories() if category["name"] == category_name), None)
+        return category["questions"] if category is not None else []
+
+    def add_category(self, name):
+        """Stores a new, empty category."""
+        raise NotImplementedError
+
+    def add_question(self, category_name, question):
+        """Appends a question to the given category."""
+        raise NotImplementedError
+
+    def load_scores(self):
+        """Returns the scores as a dictionary of {category: {identifier: score}}."""
+        raise NotImplementedError
+
+    def set_score(self, category, identifier, score):
+        """Stores a single score."""
+        self.set_scores([(category, identifier, score)])
+
+    def set_scores(self, records):
+        """Stores several (category, identifier, score) records at once."""
+        raise NotImplementedError
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """Groups several mutations into a single write."""
+        yield
+
+    def close(self):
+        """Releases the resources held by the backend."""
+
+def _read_json(path, default):
+    """Reads one of the quiz's JSON data files for the migration; returns `default` if it does not exist."""
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return default
+
+class SQLiteStorage(Storage):
+    """Backend that keeps users, questions and scores in indexed SQLite tables.
+
+    The database runs in WAL mode so readers do not block the writer. Outside
+    a transaction every mutation commits on its own; inside `transaction()`
+    they are committed together when the outermost block exits.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY,
+            email TEXT NOT NULL UNIQUE,
+            username TEXT NOT NULL UNIQUE,
+            password TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL UNIQUE
+        );
+        CREATE TABLE IF NOT EXISTS questions (
+            id INTEGER PRIMARY KEY,
+            category_id INTEGER NOT NULL REFERENCES categories(id),
+            question TEXT NOT NULL,
+            options TEXT NOT NULL,
+            correct_answer TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS questions_by_category ON questions(category_id, id);
+        CREATE TABLE IF NOT EXISTS scores (
+            category TEXT NOT NULL,
+            identifier TEXT NOT NULL,
+            score INTEGER NOT NULL,
+            PRIMARY KEY (category, identifier)
+        );
+        CREATE INDEX IF NOT EXISTS scores_by_rank ON scores(category, score DESC);
+    """
+
+    def __init__(self, path="quiz.db"):
+        self.path = path
+        self.connection = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute("PRAGMA foreign_keys=ON")
+        self.connection.executescript(self.SCHEMA)
+        self._lock = threading.RLock()
+        self._depth = 0
+
+    def find_user_by_email(self, email):
+        return self._fetch_user("SELECT email, username, password FROM users WHERE email = ?", email)
+
+    def find_user_by_username(self, username):
+        return self._fetch_user("SELECT email, username, password FROM users WHERE username = ?", username)
+
+    def load_users(self):
+        with self._lock:
+            rows = self.connection.execute("SELECT email, username, password FROM users ORDER BY id").fetchall()
+        return [{"email": email, "username": username, "password": password} for email, username, password in rows]
+
+    def add_user(self, user):
+        with self.transaction():
+            self.connection.execute(
+                "INSERT INTO users (email, username, password) VALUES (?, ?, ?)",
+                (user["email"], user["username"], user["password"]),
+            )
+
+    def update_user(self, user):
+        with self.transaction():
+            self.connection.execute(
+                "UPDATE users SET username = ?, password = ? WHERE email = ?",
+                (user["username"], user["password"], user["email"]),
+            )
+
+    def load_categories(self):
+        with self._lock:
+            categories = {
+                category_id: {"name": name, "questions": []}
+                for category_id, name in self.connection.execute("SELECT id, name FROM categories ORDER BY id")
+            }
+            rows = self.connection.execute(
+                "SELECT category_id, question, options, correct_answer FROM questions ORDER BY category_id, id"
+            ).fetchall()
+        for category_id, question, options, correct_answer in rows:
+            categories[category_id]["questions"].append(
+                {"question": question, "options": json.loads(options), "correct_answer": correct_answer}
+            )
+        return list(categories.values())
+
+    def load_category_names(self):
+        with self._lock:
+            return [name for (name,) in self.connection.execute("SELECT name FROM categories ORDER BY id")]
+
+    def load_questions(self, category_name):
+        with self._lock:
+            rows = self.connection.execute(
+                "SELECT q.question, q.options, q.correct_answer FROM questions q "
+                "JOIN categories c ON c.id = q.category_id WHERE c.name = ? ORDER BY q.id",
+                (category_name,),
+            ).fetchall()
+        return [
+            {"question": question, "options": json.loads(options), "correct_answer": correct_answer}
+            for question, options, correct_answer in rows
+        ]
+
+    def add_category(self, name):
+        with self.transaction():
+            self.connection.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+
+    def add_question(self, category_name, question):
+        with self.transaction():
+            self.connection.execute(
+                "INSERT INTO questions (category_id, question, options, correct_answer) "
+                "SELECT id, ?, ?, ? FROM categories WHERE name = ?",
+                (
+                    question["question"],
+                    json.dumps(question["options"], ensure_ascii=False),
+                    question["correct_answer"],
+                    category_name,
+                ),
+            )
+
+    def load_scores(self):
+        scores = {}
+        with self._lock:
+            rows = self.connection.execute("SELECT category, identifier, score FROM scores ORDER BY rowid").fetchall()
+        for category, identifier, score in rows:
+            scores.setdefault(category, {})[identifier] = score
+        return scores
+
+    def set_scores(self, records):
+        with self.transaction():
+            self.connection.executemany(
+                "INSERT INTO scores (category, identifier, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (category, identifier) DO UPDATE SET score = excluded.score",
+                records,
+            )
+
+    def add_scores(self, records):
+        """Stores the records whose (category, identifier) has no score yet; returns how many were added."""
+        with self.transaction():
+            before = self.connection.total_changes
+            self.connection.executemany(
+                "INSERT INTO scores (category, identifier, score) VALUES (?, ?, ?) "
+                "ON CONFLICT (category, identifier) DO NOTHING",
+                records,
+            )
+            return self.connection.total_changes - before
+
+    @contextlib.contextmanager
+    def transaction(self):
+        with self._lock:
+            if self._depth == 0:
+                self.connection.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self.connection.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self.connection.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            self.connection.close()
+
+    def _fetch_user(self, query, value):
+        with self._lock:
+            row = self.connection.execute(query, (value,)).fetchone()
+        if row is None:
+            return None
+        return {"email": row[0], "username": row[1], "password": row[2]}
+
+def migrate_json_to_sqlite(db_path, user_file="users.json", category_file="quiz_categories.json", leaderboard_file="leaderboard.json"):
+    """Imports the JSON data files into a SQLite database in one transaction.
+
+    Users, categories and scores that already exist in the database are
+    skipped, and questions are only imported into categories created by this
+    run, so the migration can be re-run safely without overwriting newer
+    scores.
+    """
+    # The JSON files are only read here; the quiz classes write them themselves when no storage is passed.
+    users = _read_json(user_file, {}).get("users", [])
+    categories = _read_json(category_file, {}).get("categories", [])
+    scores = _read_json(leaderboard_file, {})
+    target = SQLiteStorage(db_path)
+    counts = {"users": 0, "categories": 0, "questions": 0, "scores": 0}
+    try:
+        with target.transaction():
+            for user in users:
+                if target.find_user_by_email(user["email"]) or target.find_user_by_username(user["username"]):
+                    continue
+                target.add_user(user)
+                counts["users"] += 1
+            existing = {category["name"] for category in target.load_categories()}
+            for category in categories:
+                if category["name"] in existing:
+                    continue
+                target.add_category(category["name"])
+                counts["categories"] += 1
+                for question in category["questions"]:
+                    target.add_question(category["name"], question)
+                    counts["questions"] += 1
+            records = [
+                (category, identifier, score)
+                for category, category_scores in scores.items()
+                for identifier, score in category_scores.items()
+            ]
+            counts["scores"] = target.add_scores(records)
+    finally:
+        target.close()
+    return counts
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz storage tools.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    migrate = commands.add_parser("migrate", help="Import the JSON files into a SQLite database.")
+    migrate.add_argument("--db", default="quiz.db")
+    migrate.add_argument("--users", default="users.json")
+    migrate.add_argument("--categories", default="quiz_categories.json")
+    migrate.add_argument("--leaderboard", default="leaderboard.json")
+    for name, help_text in (("import", "Add questions from a CSV or JSON Lines file."),
+                            ("export", "Write every question to a CSV or JSON Lines file.")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("path", help="a .csv, .jsonl or .ndjson file")
+        command.add_argument("--db", help="use the given SQLite database instead of the JSON file")
+        command.add_argument("--categories", default="quiz_categories.json")
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        counts = migrate_json_to_sqlite(args.db, args.users, args.categories, args.leaderboard)
+        print(", ".join(f"{count} {name}" for name, count in counts.items()) + f" imported into {args.db}.")
+        return
+    from quiz import QuizCategory
+    storage = SQLiteStorage(args.db) if args.db else None
+    try:
+        quiz_category = QuizCategory(args.categories, storage=storage, lazy=True)
+        if args.command == "import":
+            summary = quiz_category.import_questions(args.path)
+            for line_number, error in summary["errors"]:
+                print(f"line {line_number}: {error}")
+            print(f"{summary['imported']} questions imported, {summary['duplicates']} duplicates skipped, "
+                  f"{summary['invalid']} invalid rows.")
+        else:
+            print(f"{quiz_category.export_questions(args.path)} questions exported to {args.path}.")
+    finally:
+        if storage is not None:
+            storage.close()
+
+if __name__ == "__main__":
+    main()